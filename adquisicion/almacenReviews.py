@@ -0,0 +1,162 @@
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Módulo con el almacén de reviews en bruto. En lugar de quedarnos solo con la media y el número
+# de ratings hasta una fecha, guardamos cada review como (book_id, review_date, stars) en parquet
+# particionado por libro, con la fecha como número de días (int32) y las estrellas como uint8.
+# Así cualquier fecha de corte o ventana se recalcula sin volver a hacer scraping. Como el scraping
+# no siempre lee todas las reviews de un libro, junto a cada partición se guarda hasta dónde cubren
+# (fecha de la última review leída y si se llegó al final) y los cortes posteriores dan NaN
+
+# --- CONSTANTES ---
+
+# Carpeta del almacén
+RUTA_ALMACEN = "reviews_historicas"
+
+EPOCA = datetime(1970, 1, 1)
+
+# --- FUNCIONES ---
+
+def getIdLibro(url_libro):
+    """Devuelve el id numérico de GoodReads de la url de un libro (/book/show/<id>...)"""
+
+    resultado = re.search(r'/book/show/(\d+)', url_libro)
+    return int(resultado.group(1)) if resultado else None
+
+def aDias(fechas):
+    """Convierte fechas (datetime o Series de fechas) a días desde 1970-01-01"""
+
+    if isinstance(fechas, datetime):
+        return (fechas - EPOCA).days
+
+    return ((pd.to_datetime(fechas) - pd.Timestamp(EPOCA)).dt.days).astype(np.int32)
+
+def rutaCobertura(ruta_almacen):
+    """Devuelve la carpeta con la cobertura de cada libro, junto a la del almacén (no dentro, para que
+    leer el almacén no mezcle los dos esquemas)"""
+
+    return ruta_almacen.rstrip(os.sep) + "_cobertura"
+
+def escribirParquet(df, ruta):
+    """Escribe a través de un fichero temporal para no dejar nunca una partición a medias"""
+
+    df.to_parquet(ruta + ".tmp", index=False)
+    os.replace(ruta + ".tmp", ruta)
+
+def guardarReviews(book_id, reviews, ruta_almacen = RUTA_ALMACEN, completo = False):
+    """Guarda las reviews (lista de (fecha, estrellas)) de un libro en su partición, sustituyendo las anteriores.
+    completo indica si se leyeron todas las reviews del libro; si no, solo se da por cubierto lo anterior
+    a la última review leída (las reviews se leen de más antigua a más reciente)"""
+
+    carpeta = os.path.join(ruta_almacen, f"book_id={book_id}")
+    os.makedirs(carpeta, exist_ok=True)
+
+    df = pd.DataFrame({
+        'review_date': np.array([aDias(fecha) for fecha, _ in reviews], dtype=np.int32),
+        'stars': np.array([estrellas for _, estrellas in reviews], dtype=np.uint8)
+    })
+
+    escribirParquet(df, os.path.join(carpeta, "reviews.parquet"))
+
+    carpeta_cobertura = os.path.join(rutaCobertura(ruta_almacen), f"book_id={book_id}")
+    os.makedirs(carpeta_cobertura, exist_ok=True)
+
+    cobertura = pd.DataFrame({
+        'ultima_fecha': pd.array([df['review_date'].max() if len(df) else None], dtype='Int32'),
+        'completo': [bool(completo)]
+    })
+    escribirParquet(cobertura, os.path.join(carpeta_cobertura, "cobertura.parquet"))
+
+def leerReviews(ruta_almacen = RUTA_ALMACEN):
+    """Lee todo el almacén como un dataframe con columnas book_id, review_date (días) y stars"""
+
+    df = pd.read_parquet(ruta_almacen)
+    df['book_id'] = df['book_id'].astype(np.int64)
+    return df[['book_id', 'review_date', 'stars']]
+
+def leerCobertura(ruta_almacen = RUTA_ALMACEN):
+    """Lee la cobertura de cada libro como un dataframe indexado por book_id con ultima_fecha (días) y completo"""
+
+    ruta = rutaCobertura(ruta_almacen)
+    if not os.path.exists(ruta):
+        return pd.DataFrame({'ultima_fecha': pd.array([], dtype='Int32'), 'completo': pd.Series([], dtype=bool)},
+                            index=pd.Index([], dtype=np.int64, name='book_id'))
+
+    df = pd.read_parquet(ruta)
+    df['book_id'] = df['book_id'].astype(np.int64)
+    return df.set_index('book_id')[['ultima_fecha', 'completo']]
+
+def getCortesCubiertos(df_reviews, corte, cobertura = None):
+    """Devuelve una Series (con el índice de corte, book_id) de bool que indica si las reviews guardadas cubren
+    cada corte (en días): se leyeron todas las reviews del libro o hay una review leída posterior al corte.
+    Los libros sin cobertura guardada (almacenes anteriores) solo se dan por cubiertos antes de su última review guardada"""
+
+    ultima = df_reviews.groupby('book_id')['review_date'].max()
+    limites = pd.DataFrame({'ultima_fecha': ultima.astype(float), 'completo': False})
+
+    if cobertura is not None:
+        cobertura = pd.DataFrame({'ultima_fecha': cobertura['ultima_fecha'].astype(float), 'completo': cobertura['completo'].astype(bool)})
+        limites = pd.concat([cobertura, limites[~limites.index.isin(cobertura.index)]])
+
+    limites = limites.reindex(corte.index)
+    ultima_fecha = limites['ultima_fecha'].fillna(-np.inf).to_numpy()
+    completo = limites['completo'].fillna(False).astype(bool).to_numpy()
+
+    return pd.Series(completo | (corte.to_numpy() < ultima_fecha), index=corte.index)
+
+def calcularRatings(df_reviews, cortes, dias_ventana = None, cobertura = None):
+    """Calcula de una vez la media (Rating) y el número (numRatings) de las reviews publicadas hasta cada
+    fecha de corte. cortes es una Series book_id -> fecha de corte (un libro puede tener varios cortes)
+    y el resultado tiene una fila por corte, con el mismo índice y orden.
+    Con dias_ventana solo se cuentan las reviews de los dias_ventana días anteriores al corte.
+    Los cortes cubiertos sin reviews dan numRatings 0 (y Rating NaN), igual que el scraping; los que
+    las reviews guardadas no cubren (ver getCortesCubiertos) dan NaN en las dos columnas"""
+
+    corte = aDias(pd.Series(cortes)).rename('corte')
+
+    # Cada par (libro, corte) distinto se calcula una vez
+    pares = pd.DataFrame({'book_id': corte.index.to_numpy(), 'corte': corte.to_numpy()}).drop_duplicates()
+    df = df_reviews.merge(pares, on='book_id', how='inner')
+
+    mascara = df['review_date'] <= df['corte']
+    if dias_ventana is not None:
+        mascara &= df['review_date'] > df['corte'] - dias_ventana
+
+    agregados = df[mascara].groupby(['book_id', 'corte'])['stars'].agg(['mean', 'count'])
+    agregados = agregados.rename(columns={'mean': 'Rating', 'count': 'numRatings'})
+    agregados['Rating'] = agregados['Rating'].round(2)
+
+    # Volvemos a una fila por corte
+    claves = pd.MultiIndex.from_arrays([corte.index.to_numpy(), corte.to_numpy()], names=['book_id', 'corte'])
+    ratings = agregados.reindex(claves)
+    ratings.index = corte.index
+
+    cubiertos = getCortesCubiertos(df_reviews, corte, cobertura)
+    ratings['numRatings'] = ratings['numRatings'].fillna(0).where(cubiertos)
+    ratings['Rating'] = ratings['Rating'].where(cubiertos)
+
+    return ratings
+
+def calcularRatingsLibros(df_libros, ruta_almacen = RUTA_ALMACEN, dias_desplazamiento = 0, dias_ventana = None):
+    """Devuelve un df con Title, Author, Rating y numRatings de cada libro usando como corte su columna
+    Date (más dias_desplazamiento días), listo para limpieza.anyadirReviewsHistoricas. Cada fila usa su
+    propia fecha, aunque el mismo libro aparezca en varias filas"""
+
+    libros = df_libros[['Title', 'Author', 'url', 'Date']].copy()
+    libros['book_id'] = libros['url'].map(lambda url: getIdLibro(url) if isinstance(url, str) else None)
+    libros = libros.dropna(subset=['book_id'])
+    libros['book_id'] = libros['book_id'].astype(np.int64)
+
+    cortes = pd.to_datetime(libros['Date']) + pd.Timedelta(days=dias_desplazamiento)
+    cortes = pd.Series(cortes.to_numpy(), index=libros['book_id'])
+
+    ratings = calcularRatings(leerReviews(ruta_almacen), cortes, dias_ventana, leerCobertura(ruta_almacen))
+
+    libros['Rating'] = ratings['Rating'].to_numpy()
+    libros['numRatings'] = ratings['numRatings'].to_numpy()
+
+    return libros[['Title', 'Author', 'Rating', 'numRatings']]
@@ -1,8 +1,19 @@
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 from fuzzywuzzy import fuzz
-import os
+import numpy as np
+import math
+import ast
+
+import adquisicion.clienteHTTP as clienteHTTP
+import adquisicion.fragmentos as fragmentos
+import adquisicion.goodreads as goodreads
+import adquisicion.parseo as parseo
+
+# Filas de autores por fragmento
+TAM_FRAGMENTO = 300
+
+# De la página del libro solo se parsea la lista de autores
+FILTRO_CONTRIBUIDORES = parseo.crearFiltro('div', class_='ContributorLinksList')
 
 def hasTwitter(soup_author):
     """Devuelve 1 si el autor del libro tiene Twitter, y 0 si no"""
@@ -45,69 +56,96 @@ def getGenres(soup_author):
     except Exception:
         return None
     
-def getInfoAuthorGoodReads(url_libro, nombre_autor):
-    """Recibe el nombre de un autor y una url de uno de sus libros, selecciona el enlace correspondiente a su perfil
-    en goodreads y extrae la información"""
+def getContribuidoresLibro(html_libro):
+    """Devuelve los autores (nombre, url del perfil) de la página de un libro, parseando solo su lista de autores"""
 
-    print(nombre_autor)
-    print(url_libro)
-    
-    if isinstance(url_libro, str):
+    return goodreads.getContributors(parseo.crearSoup(html_libro, FILTRO_CONTRIBUIDORES))
 
-        response = requests.get(url_libro)
+def leerContribuidores(contribuidores):
+    """Devuelve la lista de autores (nombre, url del perfil) guardada con un libro por goodreads.getInfoLibro,
+    o None si no se guardó. Al pasar por un csv la lista se convierte en texto y aquí se recupera"""
 
-        # Si la request tiene éxito
-        if response.status_code == 200:     
-            soup_libro = BeautifulSoup(response.text, "html.parser")
+    if isinstance(contribuidores, str):
+        try:
+            contribuidores = ast.literal_eval(contribuidores)
+        except (ValueError, SyntaxError):
+            return None
+
+    # Del parquet las listas se leen como arrays
+    if isinstance(contribuidores, (list, tuple, np.ndarray)):
+        return [tuple(contribuidor) for contribuidor in contribuidores]
+
+    return None
+
+def getContribuidoresDescargando(url_libro):
+    """Descarga la página de un libro y devuelve sus autores, o None si no se ha podido descargar"""
+
+    if not isinstance(url_libro, str):
+        return None
 
-            # Encontrar la lista ContributorLinksList
-            lista_contribuidores = soup_libro.find('div', class_='ContributorLinksList')
+    response = clienteHTTP.get(url_libro)
 
-            # Buscamos el autor en la página del libro
-            authors = lista_contribuidores.find_all('a', {'class':'ContributorLink'})
-            if authors:
+    # Si la request tiene éxito
+    if response.status_code == 200:
+        return getContribuidoresLibro(response.text)
 
-                if len(authors) == 1:
-                    selected_author = authors[0]
-                    author_url = selected_author.get('href')
-                    link_name = selected_author.find('span', class_='ContributorLink__name').text
+    return None
+
+def getInfoAuthorGoodReads(url_libro, nombre_autor, contribuidores = None):
+    """Recibe el nombre de un autor y una url de uno de sus libros, selecciona el enlace correspondiente a su perfil
+    en goodreads y extrae la información. Si se pasan los autores del libro (contribuidores, guardados por
+    goodreads.getInfoLibro) no se vuelve a descargar la página del libro"""
+
+    print(nombre_autor)
+    print(url_libro)
+
+    authors = leerContribuidores(contribuidores)
 
+    # Solo si el libro no trae sus autores buscamos el autor en la página del libro
+    if authors is None:
+        authors = getContribuidoresDescargando(url_libro)
+    
+    if authors:
+
+        if len(authors) == 1:
+            link_name, author_url = authors[0]
+
+        else:
+            # Iterar sobre los enlaces y buscar el que contenga el nombre del autor
+            # Inicializar variables para el enlace seleccionado y la puntuación máxima
+            selected_link = None
+            max_score = 0
+
+            # Iterar sobre los enlaces y calcular la similitud del nombre del autor con el texto del enlace
+            if isinstance(nombre_autor, str):
+                for link in authors:
+                    link_name = link[0].strip()
+                    similarity_score = fuzz.token_sort_ratio(nombre_autor, link_name)
+
+                    # Actualizar el enlace seleccionado si la similitud es mayor que la puntuación máxima
+                    if similarity_score > max_score:
+                        max_score = similarity_score
+                        selected_link = link
+                if selected_link:
+                    author_url = selected_link[1]
                 else:
-                    # Iterar sobre los enlaces y buscar el que contenga el nombre del autor
-                    # Inicializar variables para el enlace seleccionado y la puntuación máxima
-                    selected_link = None
-                    max_score = 0
-
-                    # Iterar sobre los enlaces y calcular la similitud del nombre del autor con el texto del enlace
-                    if isinstance(nombre_autor, str):
-                        for link in authors:
-                            link_name = link.text.strip()
-                            similarity_score = fuzz.token_sort_ratio(nombre_autor, link_name)
-
-                            # Actualizar el enlace seleccionado si la similitud es mayor que la puntuación máxima
-                            if similarity_score > max_score:
-                                max_score = similarity_score
-                                selected_link = link
-                        if selected_link:
-                            author_url = selected_link['href']
-                        else:
-                            author_url = None
-                    else:
-                        author_url = None
-
-                response = requests.get(author_url)
-                # Si la request tiene éxito
-                if response.status_code == 200:
-                
-                    soup_author = BeautifulSoup(response.text, 'html.parser')
-
-                    if soup_author:
-                        return {
-                            'HasTwitter': hasTwitter(soup_author),
-                            'Born': getBorn(soup_author),
-                            'Genres': getGenres(soup_author),
-                            'NameSearched' : link_name
-                        }
+                    author_url = None
+            else:
+                author_url = None
+
+        response = clienteHTTP.get(author_url)
+        # Si la request tiene éxito
+        if response.status_code == 200:
+        
+            soup_author = parseo.crearSoup(response.text)
+
+            if soup_author:
+                return {
+                    'HasTwitter': hasTwitter(soup_author),
+                    'Born': getBorn(soup_author),
+                    'Genres': getGenres(soup_author),
+                    'NameSearched' : link_name
+                }
     return {
         'HasTwitter': None,
         'Born': None,
@@ -115,35 +153,28 @@ def getInfoAuthorGoodReads(url_libro, nombre_autor):
         'NameSearched' : None
     }
 
-def generarDfAutoresGoodReads(ruta_carpeta):
+def infoAutoresFragmento(grupo):
+    """Obtiene la información de goodreads de los autores de un fragmento del dataframe de autores"""
+    return grupo.apply(lambda row: getInfoAuthorGoodReads(row['URL'], row['FullName'], row.get('Contributors')), axis=1).apply(pd.Series)
+
+def generarDfAutoresGoodReads(ruta_carpeta, procesos = 1):
     """Devuelve y almacena un dataframe con información sacada de la página de goodreads de cada autor"""
     
     # Cargamos el csv con los nombres y urls de ejemplo de un libro de cada autor
     # Este csv se generó en el módulo autoresWikipedia.py
     df_autores = pd.read_csv('autores_url.csv', index_col=0)
 
-    # Dividimos el DataFrame en grupos de 300 filas para facilitar su procesamiento
-    grupos = [df_autores.iloc[i:i+300] for i in range(0, len(df_autores), 300)]
-
-    # Iteramos sobre los grupos y guardamos cada uno como csv en 'ruta_carpeta'
-    for i, grupo in enumerate(grupos):
-        df_info = grupo.apply(lambda row: getInfoAuthorGoodReads(row['URL'], row['FullName']), axis=1).apply(pd.Series)
-        ruta_archivo = os.path.join(ruta_carpeta, f'autores_goodreads_{i}.csv')
-        df_info.to_csv(ruta_archivo)
-
-    # Obtenemos la lista de archivos CSV en la carpeta
-    csv_files = [file for file in os.listdir(ruta_carpeta) if file.endswith('.csv')]
-
-    # Leemos los DataFrames de cada archivo CSV y los almacenamos en una lista
-    df_list = [pd.read_csv(os.path.join(ruta_carpeta, file)) for file in csv_files]
+    # Dividimos el DataFrame en fragmentos de unas 300 filas para facilitar su procesamiento. Cada
+    # fragmento terminado se guarda en 'ruta_carpeta', así que al relanzar solo se procesan los pendientes
+    n_fragmentos = max(1, math.ceil(len(df_autores) / TAM_FRAGMENTO))
+    fragmentos.ejecutarFragmentos(df_autores, infoAutoresFragmento, ruta_carpeta, n_fragmentos, procesos)
 
-    autores_goodreads = pd.concat(df_list)
-    autores_goodreads = autores_goodreads.sort_values(by="Unnamed: 0")
+    # Unimos los fragmentos en orden
+    autores_goodreads = fragmentos.unirFragmentos(ruta_carpeta)
     autores_goodreads = autores_goodreads.reset_index(drop=True)
-    autores_goodreads = autores_goodreads.drop("Unnamed: 0", axis=1)
 
     # Guardamos el df resultante
     autores_goodreads.to_csv('autores_goodreads.csv')
 
     # Lo devolvemos
-    return autores_goodreads
\ No newline at end of file
+    return autores_goodreads
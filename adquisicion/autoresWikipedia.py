@@ -1,26 +1,69 @@
 import pandas as pd
-import requests
 import re
-from bs4 import BeautifulSoup
+import os
 import datetime
+from collections import Counter
+from urllib.parse import quote, unquote
+
+import adquisicion.clienteHTTP as clienteHTTP
+import adquisicion.concurrencia as concurrencia
+import adquisicion.dumpWikipedia as dumpWikipedia
+import adquisicion.parseo as parseo
+
+# --- CONSTANTES ---
+
+# Raíz de Wikipedia (se puede cambiar con la variable de entorno NOVELLA_WIKIPEDIA, por ejemplo
+# para apuntar a un servidor local que sirva las mismas rutas /wiki/ y /w/api.php)
+URL_WIKIPEDIA = os.environ.get("NOVELLA_WIKIPEDIA", "https://en.wikipedia.org")
+
+# Títulos máximos por consulta a la API de MediaWiki
+TAM_LOTE_API = 50
+
+# Caracteres que no pueden aparecer en un título de Wikipedia
+CARACTERES_INVALIDOS = set('|#<>[]{}')
+
+# Separador de los autores de un libro en la columna 'Author'
+SEPARADOR_AUTORES = r'\s+and\s+|\s+with\s+'
+
+# Campos que se obtienen de cada autor
+CAMPOS = ['Birthday', 'Gender', 'Birthplace', 'NumChild', 'StartYear', 'Nationality']
+
+# Fuente local de artículos (volcado o tabla de wikitexto, ver configurarFuenteLocal). Con None se usa la web
+FUENTE_LOCAL = None
+
+# Solo se parsea el contenido del artículo (infobox y texto), sin la navegación de la página
+FILTRO_ARTICULO = parseo.crearFiltro('div', id='mw-content-text')
+
+# --- FUNCIONES ---
 
 # Módulo para crear un dataframe con la información biográfica de los autores
 def crearDfAutores(df_libros):
-    """Crea y devuelve un df con los nombres de los autores y una URL de uno de sus libros a partir de un dataframe con libros y autores"""
+    """Crea y devuelve un df con los nombres de los autores y una URL de uno de sus libros a partir de un dataframe con libros y autores.
+    Si el df de libros tiene los autores de GoodReads de cada libro (columna 'Contributors', ver goodreads.getInfoLibro)
+    también se guardan, para que autoresGoodreads no tenga que volver a descargar la página del libro"""
     columnas = ['FullName', 'URL']
-    datos_autores = []
-
-    for index, row in df_libros.iterrows():
-        if isinstance(row['Author'], str):  # Verifica si es una cadena
-            autores = re.split(r'\s+and\s+|\s+with\s+', row['Author'])
-            for autor in autores:
-                autor = autor.strip()
-                datos_autores.append({'FullName': autor, 'URL': row['url']})
-    
-    df_autores = pd.DataFrame(datos_autores, columns=columnas)
+    if 'Contributors' in df_libros.columns:
+        columnas.append('Contributors')
+
+    # Solo se tienen en cuenta los autores que son cadenas
+    autores = df_libros['Author'].astype(object)
+    autores = autores.where(autores.map(lambda autor: isinstance(autor, str)))
+
+    # Separamos los autores de cada libro por columnas (una fila por autor, repitiendo la URL del libro)
+    df_autores = pd.DataFrame({
+        'FullName': autores.str.split(SEPARADOR_AUTORES, regex=True),
+        'URL': df_libros['url']
+    })
+    if 'Contributors' in columnas:
+        df_autores['Contributors'] = df_libros['Contributors']
+
+    df_autores = df_autores.explode('FullName')
+    df_autores = df_autores[df_autores['FullName'].notna()]
+    df_autores['FullName'] = df_autores['FullName'].str.strip()
+
     df_autores = df_autores.drop_duplicates(subset=['FullName'])
     df_autores = df_autores.reset_index(drop=True)
-    return df_autores
+    return df_autores[columnas]
 
 # Definimos las funciones para obtener distintos datos mediante webscraping
 def getBirthday(infoCard, soup_autor):
@@ -172,10 +215,181 @@ def getNationality(soup_autor):
             return nacionalidad_match.group(1)
     return None
 
+def getInfoCard(soup_autor):
+    """Devuelve el panel de información (infobox) del artículo de un autor, o None si no tiene"""
+
+    infoCard = soup_autor.find('table', {'class': 'infobox vcard'})
+    if not infoCard:
+        infoCard = soup_autor.find('table', {'class': 'infobox biography vcard'})
+    return infoCard
+
+def extraerInfoAutor(soup_autor):
+    """Devuelve el diccionario con la info del autor a partir del árbol de su artículo"""
+
+    infoCard = getInfoCard(soup_autor)
+
+    return {
+        'Birthday': getBirthday(infoCard, soup_autor),
+        'Gender': getGender(soup_autor),
+        'Birthplace': getBirthplace(infoCard),
+        'NumChild':getNumChild(soup_autor),
+        'StartYear': getStartYear(soup_autor),
+        'Nationality': getNationality(soup_autor)
+    }
+
+def getCeldaEtiqueta(etiquetas, etiqueta):
+    """Devuelve la primera td.infobox-data que sigue a la cabecera (th) con esa etiqueta, o None si no hay cabecera"""
+
+    th = etiquetas.get(etiqueta)
+    return th.find_next('td', class_='infobox-data') if th else None
+
+def extraerInfoAutorRapido(soup_autor):
+    """Devuelve lo mismo que extraerInfoAutor recorriendo el árbol una sola vez: las tablas y cabeceras (th)
+    se recogen en una pasada en un mapa etiqueta -> th, el texto del artículo se serializa como mucho una vez
+    y los pronombres se cuentan con un único Counter"""
+
+    # Una pasada por el árbol: infobox (con la misma preferencia de clases que getInfoCard) y cabeceras
+    infoCard = None
+    infoCard_biografia = None
+    etiquetas = {}
+    con_years = False
+
+    for tag in soup_autor.find_all(['table', 'th']):
+        if tag.name == 'table':
+            clases = ' '.join(tag.get('class', []))
+            if clases == 'infobox vcard' and infoCard is None:
+                infoCard = tag
+            elif clases == 'infobox biography vcard' and infoCard_biografia is None:
+                infoCard_biografia = tag
+        else:
+            # Como th.find(text=...), la etiqueta es el único texto de la cabecera
+            etiqueta = tag.string
+            if etiqueta is not None:
+                etiquetas.setdefault(str(etiqueta), tag)
+                con_years = con_years or "Years" in etiqueta
+
+    if infoCard is None:
+        infoCard = infoCard_biografia
+
+    # El texto completo solo se serializa si hace falta y una vez
+    texto = []
+    def getTexto():
+        if not texto:
+            texto.append(soup_autor.text)
+        return texto[0]
+
+    # --- Birthday ---
+    birthday = None
+    try:
+        if infoCard:
+            bday = infoCard.find('span', {'class':'bday'})
+            if bday:
+                birthday = bday.text
+            else:
+                bday = infoCard.find('td', {'class':'infobox-data'})
+                if bday:
+                    date = bday.find(text=True, recursive=False).strip()
+                    birthday = datetime.datetime.strptime(date, "%B %d, %Y").strftime("%Y-%m-%d")
+        else:
+            fecha_nacimiento_match = re.search(r'born\s(.*?)\)', getTexto())
+            if fecha_nacimiento_match:
+                birthday = fecha_nacimiento_match.group(1).strip()
+    except Exception:
+        birthday = None
+
+    # --- Gender ---
+    gender = None
+    info = soup_autor.find('div', {'class': 'mw-content-ltr mw-parser-output'})
+    if info:
+        paragraph = next((p for p in info.find_all('p', recursive=False) if p.get_text(strip=True)), None)
+        if paragraph is None:
+            # Sin párrafos con texto nos quedamos con el comportamiento de getGender
+            gender = getGender(soup_autor)
+        else:
+            pronombres = Counter(paragraph.get_text().lower().split())
+            masculinos = pronombres['he'] + pronombres['his']
+            femeninos = pronombres['she'] + pronombres['her']
+            gender = 'M' if masculinos > femeninos else 'F' if femeninos > masculinos else None
+
+    # --- Birthplace (solo dentro del infobox: extraerInfoAutor llama a getBirthplace con infoCard) ---
+    birthplace = None
+    born = infoCard.find('th', text='Born') if infoCard else None
+    if born:
+        celda = born.find_next('td', class_='infobox-data')
+        text_contents = celda.find_all(text=True) if celda else None
+        if text_contents and '(' not in str(text_contents[-1]):
+            birthplace = text_contents[-1].strip(',')
+
+    # --- NumChild ---
+    num_child = None
+    if 'Children' in etiquetas:
+        num_child = getCeldaEtiqueta(etiquetas, 'Children').get_text(strip=True)
+        if not num_child.isdigit():
+            num_child = None
+
+    # --- StartYear (si hay una cabecera con "Years" no se mira 'Period', como getStartYear) ---
+    start_year = None
+    if not con_years and 'Period' in etiquetas:
+        start_year = getCeldaEtiqueta(etiquetas, 'Period').get_text(strip=True).split('–')[0]
+
+    # --- Nationality ---
+    nationality = None
+    if 'Nationality' in etiquetas:
+        nacionalidad_elemento = etiquetas['Nationality'].find_next_sibling('td')
+        if nacionalidad_elemento:
+            nationality = nacionalidad_elemento.text.strip()
+    else:
+        nacionalidad_match = re.search(r'is\s(?:an?\s)?([A-Za-z]+)\s(?:novelist|writer)', getTexto())
+        if nacionalidad_match:
+            nationality = nacionalidad_match.group(1)
+
+    return {
+        'Birthday': birthday,
+        'Gender': gender,
+        'Birthplace': birthplace,
+        'NumChild': num_child,
+        'StartYear': start_year,
+        'Nationality': nationality
+    }
+
+# Formas de extraer la info de un artículo
+EXTRACTORES = {
+    'dom': extraerInfoAutor,
+    'rapido': extraerInfoAutorRapido
+}
+
+# Extractor que usan getInfoAutor y getInfoAutores
+EXTRACTOR = 'rapido'
+
+def configurarFuenteLocal(ruta_dump = None, ruta_indice = None, ruta_tabla = None):
+    """Hace que los artículos se lean de un volcado multistream (ruta_dump y ruta_indice) o de una tabla
+    de wikitexto ya extraída (ruta_tabla) en lugar de la web. Sin argumentos se vuelve a usar la web"""
+
+    global FUENTE_LOCAL
+
+    if ruta_dump is not None:
+        FUENTE_LOCAL = dumpWikipedia.DumpWikipedia(ruta_dump, ruta_indice)
+    elif ruta_tabla is not None:
+        FUENTE_LOCAL = dumpWikipedia.TablaWikitexto(ruta_tabla)
+    else:
+        FUENTE_LOCAL = None
+
+def descargarArticulo(url):
+    """Devuelve el html del artículo de una url de Wikipedia (.../wiki/Título), o None si no existe.
+    Si hay una fuente local configurada el artículo se lee de ella sin acceder a la red"""
+
+    if FUENTE_LOCAL is not None:
+        if '/wiki/' not in url:
+            return None
+        return FUENTE_LOCAL.getHtml(unquote(url.split('/wiki/', 1)[1]))
+
+    response = clienteHTTP.get(url)
+    return response.text if response.status_code == 200 else None
+
 def getInfoAutor(nombre_autor):
     """Función que devuelve un diccionario con info de un autor en base a los datos de la wikipedia"""
 
-    URL_BASE = "https://en.wikipedia.org/wiki/"
+    URL_BASE = URL_WIKIPEDIA + "/wiki/"
     AUTHOR_SUFFIX = "_(author)"
     
     nombre_autor_formateado = nombre_autor.replace(" ", "_")
@@ -186,12 +400,12 @@ def getInfoAutor(nombre_autor):
     
     url = URL_BASE + nombre_autor_formateado + AUTHOR_SUFFIX
     
-    response = requests.get(url)
+    html = descargarArticulo(url)
     
     # Si la request tiene éxito
-    if response.status_code == 200:
+    if html is not None:
         
-        soup_autor = BeautifulSoup(response.text, 'html.parser')
+        soup_autor = parseo.crearSoup(html, FILTRO_ARTICULO)
 
         # Verificamos si la página contiene la frase "may refer to:"
         may_refer_to = soup_autor.find("div", class_="mw-content-ltr mw-parser-output")
@@ -202,63 +416,177 @@ def getInfoAutor(nombre_autor):
                 novelist_url = novelist_link["href"]
                 # Construimos la URL completa si es relativa
                 if novelist_url.startswith("/"):
-                    novelist_url = "https://en.wikipedia.org" + novelist_url
+                    novelist_url = URL_WIKIPEDIA + novelist_url
                 # Hacemos click en el enlace
-                response = requests.get(novelist_url)
-                if response.status_code == 200:
-                    soup_autor = BeautifulSoup(response.text, 'html.parser')
-
-        # Buscamos el panel de información del autor
-        infoCard = soup_autor.find('table', {'class': 'infobox vcard'})
-        if not infoCard:
-            infoCard = soup_autor.find('table', {'class': 'infobox biography vcard'})
+                html = descargarArticulo(novelist_url)
+                if html is not None:
+                    soup_autor = parseo.crearSoup(html, FILTRO_ARTICULO)
     else:
         # Probamos solo con el nombre
         url = URL_BASE + nombre_autor_formateado
-        response = requests.get(url)
-        
-        if response.status_code == 200:
+        html = descargarArticulo(url)
         
-            soup_autor = BeautifulSoup(response.text, 'html.parser')
-
-            # Buscamos el panel de información del autor
-            infoCard = soup_autor.find('table', {'class': 'infobox vcard'})
-            if not infoCard:
-                infoCard = soup_autor.find('table', {'class': 'infobox biography vcard'})
+        if html is not None:
+            soup_autor = parseo.crearSoup(html, FILTRO_ARTICULO)
         else:
             print("No se ha encontrado la página de Wikipedia")
-            soup_autor, infoCard = None, None
+            soup_autor = None
         
     print("----------------------------------------",nombre_autor)
     
     if soup_autor:
-        return {
-            'Birthday': getBirthday(infoCard, soup_autor),
-            'Gender': getGender(soup_autor),
-            'Birthplace': getBirthplace(infoCard),
-            'NumChild':getNumChild(soup_autor),
-            'StartYear': getStartYear(soup_autor),
-            'Nationality': getNationality(soup_autor)
-        }
+        return EXTRACTORES[EXTRACTOR](soup_autor)
     else:
-        return {
-            'Birthday': None,
-            'Gender': None,
-            'Birthplace': None,
-            'NumChild':None,
-            'StartYear': None,
-            'Nationality': None
-        }
-
-def generarDfAutores(df_libros):
-    """Genera y devuelve un df con la información de los autores recopilada de Wikipedia a partir de los autores del df de libros de entrada"""
+        return dict.fromkeys(CAMPOS)
+
+def consultarAPI(params):
+    """Hace una consulta (action=query) a la API de MediaWiki y devuelve el JSON de la respuesta"""
+
+    params = {'action': 'query', 'format': 'json', 'formatversion': 2, **params}
+    response = clienteHTTP.get(URL_WIKIPEDIA + "/w/api.php", params=params)
+    response.raise_for_status()
+    return response.json()
+
+def resolverLote(titulos):
+    """Resuelve hasta TAM_LOTE_API títulos en una consulta siguiendo las redirecciones. Devuelve un
+    diccionario título pedido -> (título final, es desambiguación), o None si la página no existe"""
+
+    query = consultarAPI({
+        'titles': '|'.join(titulos),
+        'redirects': 1,
+        'prop': 'pageprops',
+        'ppprop': 'disambiguation'
+    }).get('query', {})
+
+    normalizados = {n['from']: n['to'] for n in query.get('normalized', [])}
+    redirecciones = {r['from']: r['to'] for r in query.get('redirects', [])}
+    paginas = {p['title']: p for p in query.get('pages', [])}
+
+    resueltos = {}
+    for titulo in titulos:
+        final = normalizados.get(titulo, titulo)
+
+        # Seguimos la cadena de redirecciones (sin entrar en bucles)
+        vistos = set()
+        while final in redirecciones and final not in vistos:
+            vistos.add(final)
+            final = redirecciones[final]
+
+        pagina = paginas.get(final)
+        if pagina is None or pagina.get('missing') or pagina.get('invalid'):
+            resueltos[titulo] = None
+        else:
+            resueltos[titulo] = (final, 'disambiguation' in pagina.get('pageprops', {}))
+
+    return resueltos
+
+def getEnlacesDesambiguacion(titulos):
+    """Devuelve, para cada página de desambiguación, la lista de títulos de artículos a los que enlaza"""
+
+    enlaces = {titulo: [] for titulo in titulos}
+
+    for i in range(0, len(titulos), TAM_LOTE_API):
+        params = {'titles': '|'.join(titulos[i:i + TAM_LOTE_API]), 'prop': 'links', 'plnamespace': 0, 'pllimit': 'max'}
+
+        # La API reparte los enlaces en varias respuestas; seguimos 'continue' hasta tenerlos todos
+        while True:
+            datos = consultarAPI(params)
+            for pagina in datos.get('query', {}).get('pages', []):
+                enlaces.setdefault(pagina['title'], []).extend(enlace['title'] for enlace in pagina.get('links', []))
+
+            if 'continue' not in datos:
+                break
+            params = {**params, **datos['continue']}
+
+    return enlaces
+
+def elegirEnlace(enlaces):
+    """Devuelve el primer enlace de una desambiguación que apunta a un novelista o escritor, como
+    getInfoAutor (que busca 'novelist' o 'writer' en el href)"""
+
+    return next((enlace for enlace in enlaces
+                 if "novelist" in enlace.lower() or "writer" in enlace.lower()), None)
+
+def resolverAutores(nombres):
+    """Decide con la API de MediaWiki qué artículo corresponde a cada autor, con la misma preferencia que
+    getInfoAutor: 'Nombre (author)' (o, si es una desambiguación, su enlace a un novelista o escritor) y,
+    si no existe, 'Nombre'. Devuelve un diccionario nombre -> título del artículo (None si no hay)"""
+
+    candidatos = {nombre: (nombre + " (author)", nombre) for nombre in nombres
+                  if isinstance(nombre, str) and nombre.strip() and not CARACTERES_INVALIDOS & set(nombre)}
+    titulos = list(dict.fromkeys(titulo for par in candidatos.values() for titulo in par))
+
+    resueltos = {}
+    for i in range(0, len(titulos), TAM_LOTE_API):
+        resueltos.update(resolverLote(titulos[i:i + TAM_LOTE_API]))
+
+    desambiguaciones = list(dict.fromkeys(
+        resueltos[autor][0] for autor, _ in candidatos.values() if resueltos.get(autor) and resueltos[autor][1]
+    ))
+    enlaces = getEnlacesDesambiguacion(desambiguaciones) if desambiguaciones else {}
+
+    articulos = dict.fromkeys(nombres)
+    for nombre, (autor, solo_nombre) in candidatos.items():
+        if resueltos.get(autor):
+            final, es_desambiguacion = resueltos[autor]
+            # Si no hay enlace a un novelista nos quedamos con la propia desambiguación, como getInfoAutor
+            articulos[nombre] = (elegirEnlace(enlaces.get(final, [])) or final) if es_desambiguacion else final
+        elif resueltos.get(solo_nombre):
+            articulos[nombre] = resueltos[solo_nombre][0]
+
+    return articulos
+
+def getInfoArticulo(titulo):
+    """Descarga el artículo de Wikipedia con ese título y devuelve la info del autor"""
+
+    if titulo is None:
+        return dict.fromkeys(CAMPOS)
+
+    html = descargarArticulo(URL_WIKIPEDIA + "/wiki/" + quote(titulo.replace(" ", "_")))
+    if html is None:
+        print(f"No se ha podido descargar el artículo {titulo}")
+        return dict.fromkeys(CAMPOS)
+
+    return EXTRACTORES[EXTRACTOR](parseo.crearSoup(html, FILTRO_ARTICULO))
+
+def getInfoAutores(nombres, max_workers = concurrencia.MAX_WORKERS):
+    """Igual que aplicar getInfoAutor a cada nombre, pero resolviendo los artículos por lotes con la API
+    de MediaWiki y descargando después solo el artículo elegido de cada autor, en paralelo.
+    Devuelve un dataframe con una fila por nombre (con el mismo índice si es una Series)"""
+
+    indice = nombres.index if isinstance(nombres, pd.Series) else None
+    articulos = resolverAutores(list(dict.fromkeys(nombres)))
+
+    infos = concurrencia.procesarEnParalelo(
+        lambda nombre: getInfoArticulo(articulos.get(nombre)),
+        nombres,
+        max_workers=max_workers,
+        descripcion="Autores de Wikipedia"
+    )
+
+    return pd.DataFrame(infos, index=indice, columns=CAMPOS)
+
+def generarDfAutores(df_libros, por_lotes = False, max_workers = concurrencia.MAX_WORKERS):
+    """Genera y devuelve un df con la información de los autores recopilada de Wikipedia a partir de los autores del df de libros de entrada.
+    Con por_lotes=True los artículos se resuelven con la API de MediaWiki y se descargan en paralelo (ver getInfoAutores).
+    Con una fuente local (configurarFuenteLocal) los artículos se leen del volcado, también en paralelo"""
 
     df_autores = crearDfAutores(df_libros)
     # Lo guardamos ya que lo utilizaremos también en autoresGoodreads
     df_autores.to_csv('autores_url.csv')
 
+    # Los autores de GoodReads de cada libro solo los necesita autoresGoodreads (a través del csv)
+    df_autores = df_autores.drop(['Contributors'], axis=1, errors='ignore')
+
     # Creamos un df con la info recopilada de GoodReads
-    df_info = df_autores['FullName'].apply(getInfoAutor).apply(pd.Series)
+    if FUENTE_LOCAL is not None:
+        # Sin red de por medio los autores se pueden procesar todos en paralelo
+        df_info = pd.DataFrame(concurrencia.procesarEnParalelo(getInfoAutor, df_autores['FullName'], max_workers, "Autores de Wikipedia"),
+                               columns=CAMPOS)
+    elif por_lotes:
+        df_info = getInfoAutores(df_autores['FullName'], max_workers)
+    else:
+        df_info = df_autores['FullName'].apply(getInfoAutor).apply(pd.Series)
 
     # Combinamos los dfs
     df_autores = pd.concat([df_autores, df_info], axis=1)
@@ -1,41 +1,107 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
+import pandas as pd
 import re
 
-def getPrice(nombre_libro):
-    """Devuelve el precio de un libro en Barnes & Noble y su formato (hardcover, paperback...)"""
-    
+import adquisicion.clienteHTTP as clienteHTTP
+import adquisicion.concurrencia as concurrencia
+import adquisicion.parseo as parseo
+import adquisicion.poolNavegadores as poolNavegadores
+
+# --- CONSTANTES ---
+
+BASE_URL = 'https://www.barnesandnoble.com/s/'
+
+# Hilos por defecto de getPrices (el ritmo real lo marca el límite de tasa de clienteHTTP)
+MAX_WORKERS = 4
+
+# Solo se parsean los bloques de precio de los resultados
+FILTRO_PRECIOS = parseo.crearFiltro(class_='product-shelf-pricing')
+
+# --- FUNCIONES ---
+
+def getUrlBusqueda(nombre_libro):
+    """Devuelve la url de la búsqueda de un título en Barnes & Noble"""
+
     nombre_libro_formateado = re.sub(r"[!,*)@#%(&$_?.^'-]", '', nombre_libro).lower().replace(' ', '+')
+    return BASE_URL + nombre_libro_formateado
 
-    # Obtenemos la url
-    base_url: str='https://www.barnesandnoble.com/s/'
-    url = base_url + nombre_libro_formateado
-    print(url)
-    
-    driver = webdriver.Chrome()
-    
-    driver.get(url)
+def extraerPrecio(price_element):
+    """Obtiene el precio y el formato a partir del texto del primer 'product-shelf-pricing'"""
 
-    # Obtenemos el elemento con el precio si aparece
-    try:
-        price_element = driver.find_element(By.CLASS_NAME, 'product-shelf-pricing').text.strip()
-        price_elements = price_element.split()
-    except NoSuchElementException:
-        print("No se encontró el precio")
-        # Si no se encuentra devolvemos None
+    price_elements = price_element.split()
+
+    if not price_elements:
         return {'Price': None, 'PriceFormat': None}
-    
+
     # Obtenemos el formato
     price_format = price_elements[0]
 
     # Obtenemos el precio si aparece (probamos con el segundo y tercer elemento)
     try:
         price = float(price_elements[1].replace('$', ''))
-    except ValueError:
+    except (ValueError, IndexError):
         try:
             price = float(price_elements[2].replace('$', ''))
-        except IndexError:
+        except (ValueError, IndexError):
             price = None
-        
-    return {'Price': price, 'PriceFormat': price_format}
\ No newline at end of file
+
+    return {'Price': price, 'PriceFormat': price_format}
+
+def getPrice(nombre_libro):
+    """Devuelve el precio de un libro en Barnes & Noble y su formato (hardcover, paperback...)"""
+
+    url = getUrlBusqueda(nombre_libro)
+    print(url)
+
+    # Tomamos prestado un navegador del pool (se devuelve al salir del bloque)
+    with poolNavegadores.navegador() as driver:
+        driver.get(url)
+
+        # Obtenemos el elemento con el precio si aparece
+        try:
+            price_element = driver.find_element(By.CLASS_NAME, 'product-shelf-pricing').text.strip()
+        except NoSuchElementException:
+            print("No se encontró el precio")
+            # Si no se encuentra devolvemos None
+            return {'Price': None, 'PriceFormat': None}
+
+    return extraerPrecio(price_element)
+
+def getPriceHTTP(nombre_libro):
+    """Igual que getPrice, pero descargando el html de la búsqueda con clienteHTTP en lugar de abrir un navegador"""
+
+    url = getUrlBusqueda(nombre_libro)
+
+    try:
+        respuesta = clienteHTTP.get(url)
+        respuesta.raise_for_status()
+    except Exception as e:
+        print(f"Error al descargar {url}: {e}")
+        return {'Price': None, 'PriceFormat': None}
+
+    soup = parseo.crearSoup(respuesta.content, FILTRO_PRECIOS)
+    price_element = soup.find(class_='product-shelf-pricing')
+
+    if price_element is None:
+        print(f"No se encontró el precio de {nombre_libro}")
+        return {'Price': None, 'PriceFormat': None}
+
+    return extraerPrecio(price_element.get_text(' ', strip=True))
+
+def getPrices(titulos, max_workers = MAX_WORKERS, usarNavegador = False):
+    """Obtiene en paralelo el precio y el formato de una lista o Series de títulos. Con usarNavegador=True
+    se usa Selenium y la concurrencia real la limita el tamaño de poolNavegadores.
+    Devuelve un dataframe con una fila por título, en el mismo orden (y con el mismo índice si es una Series)"""
+
+    indice = titulos.index if isinstance(titulos, pd.Series) else None
+    funcion = getPrice if usarNavegador else getPriceHTTP
+
+    precios = concurrencia.procesarEnParalelo(
+        funcion,
+        titulos,
+        max_workers=max_workers,
+        descripcion="Precios de Barnes & Noble"
+    )
+
+    return pd.DataFrame(precios, index=indice, columns=['Price', 'PriceFormat'])
@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# zstd comprime más rápido y mejor que zlib, pero si no está instalado usamos zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Módulo con la caché persistente de respuestas HTTP. Guarda en SQLite los cuerpos comprimidos
+# de las respuestas 200 indexados por URL, de forma que al relanzar un scraper (tras un fallo o
+# tras cambiar un parser) las páginas ya descargadas se leen del disco
+
+# --- CONSTANTES ---
+
+# Fichero SQLite de la caché (se puede cambiar con la variable de entorno NOVELLA_CACHE)
+RUTA_CACHE = os.environ.get("NOVELLA_CACHE", "cache_http.sqlite")
+
+# Si es True solo se sirven respuestas de la caché, nunca se accede a la red
+OFFLINE = os.environ.get("NOVELLA_OFFLINE", "0") == "1"
+
+# Si es False el cliente HTTP no usa la caché
+ACTIVADA = True
+
+# Tamaño máximo de la caché en bytes (comprimidos). Al superarse se eliminan las entradas
+# usadas hace más tiempo hasta bajar al 90% del máximo
+TAM_MAXIMO = 2 * 1024 ** 3
+
+# Cada cuántas inserciones se comprueba el tamaño total
+COMPROBAR_TAM_CADA = 100
+
+DIA = 24 * 60 * 60
+
+"""
+    Tiempo de vida (en segundos) de las respuestas de cada host. None significa que no
+    caducan (las listas pasadas del NYT no cambian) y 0 que no se guardan en la caché.
+    Los hosts que no aparecen aquí usan TTL_POR_DEFECTO.
+"""
+TTL_POR_HOST = {
+    "www.nytimes.com": None,
+    "www.goodreads.com": 30 * DIA,
+    "en.wikipedia.org": 90 * DIA,
+    "www.barnesandnoble.com": 7 * DIA,
+    "drive.google.com": 0
+}
+
+TTL_POR_DEFECTO = 30 * DIA
+
+# --- ESTADO COMPARTIDO ---
+
+_local = threading.local()
+_lock = threading.Lock()
+_inserciones = 0
+
+# --- FUNCIONES ---
+
+def configurar(ruta = None, offline = None, activada = None, tam_maximo = None):
+    """Cambia la configuración de la caché (fichero, modo offline, activación y tamaño máximo)"""
+
+    global RUTA_CACHE, OFFLINE, ACTIVADA, TAM_MAXIMO
+
+    if ruta is not None:
+        RUTA_CACHE = ruta
+    if offline is not None:
+        OFFLINE = offline
+    if activada is not None:
+        ACTIVADA = activada
+    if tam_maximo is not None:
+        TAM_MAXIMO = tam_maximo
+
+def getConexion():
+    """Devuelve la conexión SQLite del hilo actual (una por hilo), creando la tabla si no existe"""
+
+    conexion = getattr(_local, "conexion", None)
+
+    if conexion is None or _local.ruta != RUTA_CACHE:
+        conexion = sqlite3.connect(RUTA_CACHE, timeout=60)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                url TEXT PRIMARY KEY,
+                estado INTEGER,
+                cabeceras TEXT,
+                codificacion TEXT,
+                codec TEXT,
+                cuerpo BLOB,
+                tamanyo INTEGER,
+                guardado REAL,
+                ultimo_acceso REAL
+            )""")
+        conexion.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON respuestas (ultimo_acceso)")
+        conexion.commit()
+        _local.conexion = conexion
+        _local.ruta = RUTA_CACHE
+
+    return conexion
+
+def getTTL(url):
+    """Devuelve el tiempo de vida de las respuestas de una URL según su host"""
+
+    return TTL_POR_HOST.get(urlparse(url).netloc, TTL_POR_DEFECTO)
+
+def comprimir(datos):
+    """Comprime los datos con zstd si está disponible y con zlib si no. Devuelve (codec, datos)"""
+
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(datos)
+    return "zlib", zlib.compress(datos, 6)
+
+def descomprimir(codec, datos):
+    """Descomprime los datos guardados con el codec indicado"""
+
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return zlib.decompress(datos)
+
+def crearRespuesta(url, estado, cabeceras, codificacion, cuerpo):
+    """Construye un objeto requests.Response a partir de los datos guardados"""
+
+    respuesta = requests.Response()
+    respuesta.url = url
+    respuesta.status_code = estado
+    respuesta.headers = CaseInsensitiveDict(cabeceras)
+    respuesta.encoding = codificacion
+    respuesta._content = cuerpo
+    respuesta.from_cache = True
+    return respuesta
+
+def crearRespuestaNoDisponible(url):
+    """Respuesta 504 que se devuelve en modo offline cuando la URL no está en la caché
+    (mismo comportamiento que 'Cache-Control: only-if-cached')"""
+
+    return crearRespuesta(url, 504, {}, None, b"")
+
+def leer(url):
+    """Devuelve la respuesta guardada para una URL o None si no está o ha caducado"""
+
+    conexion = getConexion()
+    fila = conexion.execute(
+        "SELECT estado, cabeceras, codificacion, codec, cuerpo, guardado FROM respuestas WHERE url = ?", (url,)
+    ).fetchone()
+
+    if fila is None:
+        return None
+
+    estado, cabeceras, codificacion, codec, cuerpo, guardado = fila
+    ttl = getTTL(url)
+
+    # En modo offline se sirven también las respuestas caducadas
+    if not OFFLINE and ttl is not None and time.time() - guardado > ttl:
+        return None
+
+    with conexion:
+        conexion.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE url = ?", (time.time(), url))
+
+    return crearRespuesta(url, estado, json.loads(cabeceras), codificacion, descomprimir(codec, cuerpo))
+
+def guardar(url, respuesta):
+    """Guarda una respuesta en la caché si es un 200 y su host se cachea"""
+
+    global _inserciones
+
+    if respuesta.status_code != 200 or getTTL(url) == 0:
+        return
+
+    codec, cuerpo = comprimir(respuesta.content)
+    cabeceras = {clave: valor for clave, valor in respuesta.headers.items() if clave.lower() == "content-type"}
+    ahora = time.time()
+
+    conexion = getConexion()
+    with conexion:
+        conexion.execute(
+            "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, respuesta.status_code, json.dumps(cabeceras), respuesta.encoding, codec, cuerpo, len(cuerpo), ahora, ahora)
+        )
+
+    with _lock:
+        _inserciones += 1
+        comprobar = _inserciones % COMPROBAR_TAM_CADA == 0
+
+    if comprobar:
+        desalojar()
+
+def desalojar():
+    """Elimina las entradas usadas hace más tiempo mientras la caché supere su tamaño máximo"""
+
+    conexion = getConexion()
+    total = conexion.execute("SELECT COALESCE(SUM(tamanyo), 0) FROM respuestas").fetchone()[0]
+
+    if total <= TAM_MAXIMO:
+        return
+
+    objetivo = total - int(TAM_MAXIMO * 0.9)
+    liberado = 0
+    urls = []
+
+    for url, tamanyo in conexion.execute("SELECT url, tamanyo FROM respuestas ORDER BY ultimo_acceso"):
+        urls.append((url,))
+        liberado += tamanyo
+        if liberado >= objetivo:
+            break
+
+    with conexion:
+        conexion.executemany("DELETE FROM respuestas WHERE url = ?", urls)
+
+def limpiarCaducadas():
+    """Elimina de la caché todas las respuestas caducadas"""
+
+    conexion = getConexion()
+    ahora = time.time()
+    urls = [(url,) for url, guardado in conexion.execute("SELECT url, guardado FROM respuestas")
+            if getTTL(url) is not None and ahora - guardado > getTTL(url)]
+
+    with conexion:
+        conexion.executemany("DELETE FROM respuestas WHERE url = ?", urls)
+
+    return len(urls)
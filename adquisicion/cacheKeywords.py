@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Módulo con la caché persistente de keywords de Google Trends (título -> MID que devuelve
+# googleTrends.getAdvancedKeyword). Se guarda en SQLite con una caché LRU en memoria delante,
+# e incluye los resultados negativos (títulos sin sugerencia de tipo libro) para que ninguna
+# consulta de sugerencias se haga dos veces
+
+# --- CONSTANTES ---
+
+# Fichero SQLite de la caché (se puede cambiar con la variable de entorno NOVELLA_CACHE_KEYWORDS)
+RUTA_CACHE = os.environ.get("NOVELLA_CACHE_KEYWORDS", "cache_keywords.sqlite")
+
+# Entradas que se mantienen en memoria
+TAM_MEMORIA = 10000
+
+# Valor que devuelve leer cuando el título no está en la caché (None es un resultado negativo)
+NO_CACHEADO = object()
+
+# --- ESTADO COMPARTIDO ---
+
+_local = threading.local()
+_lock = threading.Lock()
+_memoria = OrderedDict()
+
+# --- FUNCIONES ---
+
+def configurar(ruta = None, tam_memoria = None):
+    """Cambia el fichero de la caché y el número de entradas en memoria"""
+
+    global RUTA_CACHE, TAM_MEMORIA
+
+    if ruta is not None and ruta != RUTA_CACHE:
+        RUTA_CACHE = ruta
+        vaciarMemoria()
+    if tam_memoria is not None:
+        TAM_MEMORIA = tam_memoria
+
+def vaciarMemoria():
+    with _lock:
+        _memoria.clear()
+
+def getConexion():
+    """Devuelve la conexión SQLite del hilo actual (una por hilo), creando la tabla si no existe"""
+
+    conexion = getattr(_local, "conexion", None)
+
+    if conexion is None or _local.ruta != RUTA_CACHE:
+        conexion = sqlite3.connect(RUTA_CACHE, timeout=60)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("""
+            CREATE TABLE IF NOT EXISTS keywords (
+                titulo TEXT PRIMARY KEY,
+                mid TEXT,
+                guardado REAL
+            )""")
+        conexion.commit()
+        _local.conexion = conexion
+        _local.ruta = RUTA_CACHE
+
+    return conexion
+
+def recordar(titulo, mid):
+    """Guarda la entrada en la caché en memoria, descartando la usada hace más tiempo si está llena"""
+
+    with _lock:
+        _memoria[titulo] = mid
+        _memoria.move_to_end(titulo)
+        while len(_memoria) > TAM_MEMORIA:
+            _memoria.popitem(last=False)
+
+def leer(titulo):
+    """Devuelve el MID guardado para un título, None si se sabe que no tiene o NO_CACHEADO si no se ha consultado"""
+
+    with _lock:
+        if titulo in _memoria:
+            _memoria.move_to_end(titulo)
+            return _memoria[titulo]
+
+    fila = getConexion().execute("SELECT mid FROM keywords WHERE titulo = ?", (titulo,)).fetchone()
+    if fila is None:
+        return NO_CACHEADO
+
+    recordar(titulo, fila[0])
+    return fila[0]
+
+def guardar(titulo, mid):
+    """Guarda el MID de un título (None para los títulos sin sugerencia de tipo libro)"""
+
+    conexion = getConexion()
+    with conexion:
+        conexion.execute("INSERT OR REPLACE INTO keywords VALUES (?, ?, ?)", (titulo, mid, time.time()))
+
+    recordar(titulo, mid)
+
+def getNoCacheados(titulos):
+    """Devuelve los títulos distintos (en orden) que no están en la caché"""
+
+    conexion = getConexion()
+    guardados = set()
+    titulos = list(dict.fromkeys(titulos))
+
+    # SQLite limita el número de parámetros de una consulta, así que preguntamos por bloques
+    for i in range(0, len(titulos), 500):
+        bloque = titulos[i:i + 500]
+        consulta = "SELECT titulo FROM keywords WHERE titulo IN (%s)" % ",".join("?" * len(bloque))
+        guardados.update(titulo for titulo, in conexion.execute(consulta, bloque))
+
+    return [titulo for titulo in titulos if titulo not in guardados]
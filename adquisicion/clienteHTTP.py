@@ -0,0 +1,157 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import adquisicion.cacheHTTP as cacheHTTP
+
+# Módulo con el cliente HTTP que comparten todos los scrapers: una única sesión con pool de
+# conexiones keep-alive, timeouts, reintentos con backoff exponencial, límites de tasa por host
+# y caché persistente de respuestas (ver cacheHTTP)
+
+# --- CONSTANTES ---
+
+# Timeout por defecto (conexión, lectura) en segundos
+TIMEOUT = (10, 30)
+
+# Reintentos ante errores de conexión y respuestas 429/5xx. La espera entre intentos es
+# FACTOR_BACKOFF * 2^(intento - 1) segundos (o lo que indique la cabecera Retry-After)
+REINTENTOS = 5
+FACTOR_BACKOFF = 1
+ESTADOS_REINTENTO = (429, 500, 502, 503, 504)
+
+# Conexiones que se mantienen abiertas por host
+TAM_POOL = 10
+
+# Cabeceras que se envían en todas las peticiones
+CABECERAS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36"
+}
+
+"""
+    Límites de tasa por host: (peticiones por segundo, ráfaga máxima).
+    Los hosts que no aparecen aquí usan LIMITE_POR_DEFECTO.
+"""
+LIMITES_POR_HOST = {
+    "www.goodreads.com": (1, 2),
+    "en.wikipedia.org": (5, 10),
+    "www.nytimes.com": (2, 4),
+    "www.barnesandnoble.com": (0.5, 1),
+    "drive.google.com": (2, 4)
+}
+
+LIMITE_POR_DEFECTO = (2, 4)
+
+# --- ESTADO COMPARTIDO ---
+
+_sesion = None
+_cubos = {}
+_lock = threading.Lock()
+
+# --- FUNCIONES ---
+
+class CuboTokens:
+    """Cubo de tokens: permite 'rafaga' peticiones seguidas y, a partir de ahí, 'tasa' peticiones por segundo"""
+
+    def __init__(self, tasa, rafaga):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.tokens = rafaga
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consumir(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.tokens = min(self.rafaga, self.tokens + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                espera = (1 - self.tokens) / self.tasa
+
+            time.sleep(espera)
+
+def getSesion():
+    """Devuelve la sesión compartida, creándola la primera vez"""
+
+    global _sesion
+
+    with _lock:
+        if _sesion is None:
+            reintentos = Retry(
+                total=REINTENTOS,
+                backoff_factor=FACTOR_BACKOFF,
+                status_forcelist=ESTADOS_REINTENTO,
+                # Los únicos POST son consultas GraphQL de solo lectura, así que también se pueden repetir
+                allowed_methods=["GET", "HEAD", "POST"],
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=len(LIMITES_POR_HOST) + 1, pool_maxsize=TAM_POOL, max_retries=reintentos)
+
+            _sesion = requests.Session()
+            _sesion.headers.update(CABECERAS)
+            _sesion.mount("https://", adapter)
+            _sesion.mount("http://", adapter)
+
+        return _sesion
+
+def getCubo(host):
+    """Devuelve el cubo de tokens asociado a un host"""
+
+    with _lock:
+        if host not in _cubos:
+            tasa, rafaga = LIMITES_POR_HOST.get(host, LIMITE_POR_DEFECTO)
+            _cubos[host] = CuboTokens(tasa, rafaga)
+        return _cubos[host]
+
+def configurarLimite(host, tasa, rafaga):
+    """Cambia el límite de tasa (peticiones por segundo y ráfaga) de un host"""
+
+    with _lock:
+        LIMITES_POR_HOST[host] = (tasa, rafaga)
+        _cubos.pop(host, None)
+
+def get(url, timeout = TIMEOUT, usarCache = True, **kwargs):
+    """Hace una petición GET respetando el límite de tasa del host y reutilizando las conexiones.
+    Si la URL está en la caché se devuelve la respuesta guardada sin acceder a la red"""
+
+    usarCache = usarCache and cacheHTTP.ACTIVADA
+
+    # La clave de la caché es la URL completa, incluidos los parámetros
+    clave = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+
+    if usarCache:
+        respuesta = cacheHTTP.leer(clave)
+        if respuesta is not None:
+            return respuesta
+
+    # Sin conexión nunca se accede a la red, se use o no la caché
+    if cacheHTTP.OFFLINE:
+        return cacheHTTP.crearRespuestaNoDisponible(clave)
+
+    getCubo(urlparse(url).netloc).consumir()
+    respuesta = getSesion().get(url, timeout=timeout, **kwargs)
+
+    if usarCache:
+        cacheHTTP.guardar(clave, respuesta)
+
+    return respuesta
+
+def post(url, timeout = TIMEOUT, **kwargs):
+    """Hace una petición POST (sin caché) respetando el límite de tasa del host y reutilizando las conexiones"""
+
+    if cacheHTTP.OFFLINE:
+        return cacheHTTP.crearRespuestaNoDisponible(url)
+
+    getCubo(urlparse(url).netloc).consumir()
+    return getSesion().post(url, timeout=timeout, **kwargs)
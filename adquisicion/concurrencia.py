@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Módulo con utilidades para lanzar en paralelo las funciones de adquisición. Las peticiones
+# pasan por clienteHTTP, así que el ritmo real lo marcan los límites de tasa de cada host
+
+# --- CONSTANTES ---
+
+# Hilos por defecto
+MAX_WORKERS = 8
+
+# Cada cuántos elementos terminados se muestra el progreso
+MOSTRAR_CADA = 25
+
+# --- FUNCIONES ---
+
+def mostrarProgreso(descripcion, hechos, total, inicio):
+    """Muestra cuántos elementos se han procesado, el ritmo (elementos/s) y el tiempo restante estimado"""
+
+    transcurrido = time.perf_counter() - inicio
+    ritmo = hechos / transcurrido if transcurrido > 0 else 0.0
+    restante = (total - hechos) / ritmo if ritmo > 0 else float('nan')
+
+    print(f"{descripcion}: {hechos}/{total} ({ritmo:.2f}/s, quedan ~{restante:.0f} s)")
+
+def procesarEnParalelo(funcion, elementos, max_workers = MAX_WORKERS, descripcion = "Procesados", mostrar_cada = MOSTRAR_CADA):
+    """Aplica la función a cada elemento con un pool de max_workers hilos y devuelve
+    la lista de resultados en el mismo orden que los elementos"""
+
+    elementos = list(elementos)
+    resultados = [None] * len(elementos)
+
+    if not elementos:
+        return resultados
+
+    inicio = time.perf_counter()
+    hechos = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(funcion, elemento): i for i, elemento in enumerate(elementos)}
+
+        for futuro in as_completed(futuros):
+            resultados[futuros[futuro]] = futuro.result()
+
+            hechos += 1
+            if hechos % mostrar_cada == 0 or hechos == len(elementos):
+                mostrarProgreso(descripcion, hechos, len(elementos), inicio)
+
+    return resultados
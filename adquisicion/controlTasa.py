@@ -0,0 +1,89 @@
+import time
+from collections import deque
+
+# Módulo con un controlador de tasa adaptativo (AIMD: aumento aditivo, disminución multiplicativa)
+# para servicios que no publican su límite, como Google Trends. Mientras las peticiones tienen
+# éxito la tasa sube poco a poco; cada vez que el servicio responde 429 se reduce a la mitad
+
+# --- CONSTANTES ---
+
+# Tasas en peticiones por segundo
+TASA_INICIAL = 1.0
+TASA_MINIMA = 1 / 300
+TASA_MAXIMA = 2.0
+
+# Aumento tras cada éxito y factor de reducción tras cada 429
+INCREMENTO = 0.02
+FACTOR_REDUCCION = 0.5
+
+# Segundos de historial para las métricas en vivo
+VENTANA_METRICAS = 60
+
+# --- FUNCIONES ---
+
+class ControladorAIMD:
+    """Marca el ritmo de las peticiones y publica métricas (peticiones/min, tasa de error y tiempo restante)"""
+
+    def __init__(self, tasa = TASA_INICIAL, tasa_minima = TASA_MINIMA, tasa_maxima = TASA_MAXIMA,
+                 incremento = INCREMENTO, factor_reduccion = FACTOR_REDUCCION):
+        self.tasa = tasa
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima
+        self.incremento = incremento
+        self.factor_reduccion = factor_reduccion
+
+        self.ultima = None
+        # (instante, éxito) de las peticiones recientes
+        self.historial = deque()
+        self.resueltos = 0
+        self.inicio = time.monotonic()
+
+    def esperar(self):
+        """Espera lo necesario para no superar la tasa actual"""
+
+        if self.ultima is not None:
+            espera = self.ultima + 1 / self.tasa - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+        self.ultima = time.monotonic()
+
+    def registrar(self, exito):
+        ahora = time.monotonic()
+        self.historial.append((ahora, exito))
+        while self.historial and ahora - self.historial[0][0] > VENTANA_METRICAS:
+            self.historial.popleft()
+
+    def exito(self):
+        """Registra una petición resuelta y aumenta la tasa"""
+
+        self.registrar(True)
+        self.resueltos += 1
+        self.tasa = min(self.tasa_maxima, self.tasa + self.incremento)
+
+    def limitado(self):
+        """Registra una respuesta 429 y reduce la tasa"""
+
+        self.registrar(False)
+        self.tasa = max(self.tasa_minima, self.tasa * self.factor_reduccion)
+
+    def metricas(self, pendientes):
+        """Devuelve las peticiones por minuto y la tasa de error del último minuto y el tiempo restante estimado (s)"""
+
+        peticiones = len(self.historial)
+        errores = sum(1 for _, exito in self.historial if not exito)
+        transcurrido = min(VENTANA_METRICAS, time.monotonic() - self.inicio)
+
+        peticiones_min = peticiones * 60 / transcurrido if transcurrido > 0 else 0.0
+        tasa_error = errores / peticiones if peticiones else 0.0
+
+        # El tiempo restante se estima con el ritmo de resolución desde el inicio
+        ritmo = self.resueltos / (time.monotonic() - self.inicio)
+        restante = pendientes / ritmo if ritmo > 0 else float('nan')
+
+        return {'PeticionesMin': peticiones_min, 'TasaError': tasa_error, 'RestanteSeg': restante}
+
+    def mostrar(self, pendientes):
+        m = self.metricas(pendientes)
+        print(f"{m['PeticionesMin']:.1f} peticiones/min | error {m['TasaError']:.0%} | "
+              f"tasa {self.tasa * 60:.1f}/min | pendientes {pendientes} | quedan ~{m['RestanteSeg'] / 60:.0f} min")
@@ -0,0 +1,100 @@
+import json
+import os
+
+import pandas as pd
+
+# Módulo con un diario de checkpoints de solo anexado (JSONL). En lugar de reescribir el csv
+# completo cada N filas, cada resultado se añade como una línea al final del diario; al reanudar
+# se saltan las claves ya anotadas y al terminar se compacta el diario en el fichero final
+
+# --- CONSTANTES ---
+
+# Columnas que identifican un libro
+CLAVES = ('Title', 'Author')
+
+# --- FUNCIONES ---
+
+def serializar(valor):
+    """Convierte a tipos de JSON los valores que json no sabe serializar (escalares de numpy, fechas...)"""
+
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return str(valor)
+
+def anotar(ruta_diario, registros):
+    """Añade al final del diario uno o varios registros (diccionarios) y los fuerza a disco"""
+
+    if isinstance(registros, dict):
+        registros = [registros]
+
+    lineas = ''.join(json.dumps(registro, default=serializar, ensure_ascii=False) + '\n' for registro in registros)
+
+    # Si la última escritura se cortó a medias empezamos en una línea nueva para no pegarnos a ella
+    if os.path.exists(ruta_diario) and os.path.getsize(ruta_diario) > 0:
+        with open(ruta_diario, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                lineas = '\n' + lineas
+
+    with open(ruta_diario, 'a', encoding='utf-8') as f:
+        f.write(lineas)
+        f.flush()
+        os.fsync(f.fileno())
+
+def leerDiario(ruta_diario):
+    """Devuelve la lista de registros del diario. Una última línea incompleta (corte a mitad
+    de una escritura) se ignora"""
+
+    registros = []
+
+    if not os.path.exists(ruta_diario):
+        return registros
+
+    with open(ruta_diario, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                print(f"Línea incompleta en {ruta_diario}, se ignora")
+
+    return registros
+
+def clavesAnotadas(ruta_diario, claves = CLAVES):
+    """Devuelve el conjunto de claves (tuplas) que ya tienen un registro en el diario"""
+
+    return {tuple(registro[clave] for clave in claves) for registro in leerDiario(ruta_diario)}
+
+def aplicarDiario(df, ruta_diario, claves = CLAVES):
+    """Copia en el dataframe los valores anotados en el diario para las filas con la misma clave.
+    Si una clave aparece varias veces prevalece el último registro"""
+
+    registros = leerDiario(ruta_diario)
+    if not registros:
+        return df
+
+    df_diario = pd.DataFrame(registros).drop_duplicates(subset=list(claves), keep='last')
+    df_diario = df_diario.set_index(list(claves))
+
+    # Posición de cada fila del df en el diario (-1 si no está)
+    posiciones = df_diario.index.get_indexer(pd.MultiIndex.from_frame(df[list(claves)]))
+    anotadas = posiciones >= 0
+
+    for columna in df_diario.columns:
+        valores = df_diario[columna].to_numpy()[posiciones[anotadas]]
+        if columna not in df.columns:
+            df[columna] = None
+        df.loc[anotadas, columna] = valores
+
+    return df
+
+def compactar(df, ruta_diario, ruta_salida, claves = CLAVES):
+    """Vuelca el diario sobre el dataframe y guarda el resultado en ruta_salida (csv o parquet)"""
+
+    df = aplicarDiario(df, ruta_diario, claves)
+
+    if ruta_salida.endswith('.parquet'):
+        df.to_parquet(ruta_salida)
+    else:
+        df.to_csv(ruta_salida)
+
+    return df
@@ -0,0 +1,370 @@
+import bisect
+import bz2
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import quote
+
+import pandas as pd
+from lxml import etree
+
+# Módulo con un backend local de Wikipedia para autoresWikipedia. Lee los artículos de un volcado
+# multistream (pages-articles-multistream.xml.bz2 y su índice multistream-index.txt.bz2) o de una
+# tabla ya extraída (título, wikitexto) y convierte el wikitexto en un html mínimo con la misma
+# estructura que la web (infobox con th/td.infobox-data, párrafos y enlaces /wiki/), de modo que
+# las funciones getBirthday, getBirthplace, getNumChild, getStartYear y getNationality funcionan igual.
+# El índice título -> posición se carga en memoria, así que cada consulta es un único seek
+
+# --- CONSTANTES ---
+
+# Bloques (streams) descomprimidos que se mantienen en memoria
+TAM_CACHE_BLOQUES = 16
+
+# Redirecciones que se siguen como máximo
+MAX_REDIRECCIONES = 5
+
+# Parámetros del infobox que se pasan al html y etiqueta (th) con la que aparecen en la web
+ETIQUETAS_INFOBOX = {
+    'children': 'Children',
+    'nationality': 'Nationality',
+    'period': 'Period',
+    'years_active': 'Years active',
+    'yearsactive': 'Years active'
+}
+
+# Plantillas de fecha de nacimiento ({{birth date and age|1950|1|2}}...)
+PLANTILLAS_NACIMIENTO = {'birth date', 'birth date and age', 'birth-date', 'birth-date and age', 'bda', 'dob'}
+
+# Plantillas de listas cuyo contenido se conserva ({{ubl|a|b}} -> a, b)
+PLANTILLAS_LISTA = {'ubl', 'unbulleted list', 'plainlist', 'flatlist', 'hlist', 'nowrap'}
+
+# --- FUNCIONES ---
+
+def normalizarTitulo(titulo):
+    """Convierte un título o fragmento de url al formato del índice (espacios y primera letra mayúscula)"""
+
+    titulo = titulo.replace('_', ' ').strip()
+    return titulo[:1].upper() + titulo[1:]
+
+def buscarCierre(texto, inicio, abre, cierra):
+    """Devuelve la posición justo después del cierre que corresponde a la apertura en inicio"""
+
+    profundidad = 0
+    i = inicio
+    while i < len(texto):
+        if texto.startswith(abre, i):
+            profundidad += 1
+            i += len(abre)
+        elif texto.startswith(cierra, i):
+            profundidad -= 1
+            i += len(cierra)
+            if profundidad == 0:
+                return i
+        else:
+            i += 1
+    return len(texto)
+
+def dividirParametros(contenido):
+    """Divide el contenido de una plantilla por las barras que no están dentro de otra plantilla o enlace"""
+
+    partes = []
+    profundidad = 0
+    actual = 0
+    i = 0
+    while i < len(contenido):
+        if contenido.startswith('{{', i) or contenido.startswith('[[', i):
+            profundidad += 1
+            i += 2
+        elif contenido.startswith('}}', i) or contenido.startswith(']]', i):
+            profundidad -= 1
+            i += 2
+        elif contenido[i] == '|' and profundidad == 0:
+            partes.append(contenido[actual:i])
+            actual = i + 1
+            i += 1
+        else:
+            i += 1
+    partes.append(contenido[actual:])
+    return partes
+
+def leerPlantilla(texto):
+    """Devuelve el nombre (en minúsculas), los parámetros posicionales y los nombrados de una plantilla {{...}}"""
+
+    partes = dividirParametros(texto[2:-2])
+    nombre = partes[0].strip().lower()
+    posicionales, nombrados = [], {}
+
+    for parte in partes[1:]:
+        clave, igual, valor = parte.partition('=')
+        if igual and re.fullmatch(r'\s*[\w ]+\s*', clave):
+            nombrados[clave.strip().lower().replace(' ', '_')] = valor.strip()
+        else:
+            posicionales.append(parte.strip())
+
+    return nombre, posicionales, nombrados
+
+def quitarComentarios(wikitexto):
+    """Quita los comentarios html y las referencias (<ref>...</ref> y <ref .../>)"""
+
+    wikitexto = re.sub(r'<!--.*?-->', '', wikitexto, flags=re.S)
+    wikitexto = re.sub(r'<ref[^>]*/>', '', wikitexto)
+    return re.sub(r'<ref[^>]*>.*?</ref>', '', wikitexto, flags=re.S)
+
+def sustituirPlantillas(wikitexto, sustituir):
+    """Sustituye cada plantilla de primer nivel por lo que devuelva sustituir(texto de la plantilla)"""
+
+    trozos = []
+    i = 0
+    while True:
+        inicio = wikitexto.find('{{', i)
+        if inicio < 0:
+            trozos.append(wikitexto[i:])
+            break
+        fin = buscarCierre(wikitexto, inicio, '{{', '}}')
+        trozos.append(wikitexto[i:inicio])
+        trozos.append(sustituir(wikitexto[inicio:fin]))
+        i = fin
+    return ''.join(trozos)
+
+def quitarArchivos(wikitexto):
+    """Quita las imágenes y archivos ([[File:...]], que pueden tener enlaces dentro)"""
+
+    trozos = []
+    i = 0
+    while True:
+        inicio = re.search(r'\[\[(?:File|Image):', wikitexto[i:], flags=re.I)
+        if inicio is None:
+            trozos.append(wikitexto[i:])
+            break
+        inicio = i + inicio.start()
+        trozos.append(wikitexto[i:inicio])
+        i = buscarCierre(wikitexto, inicio, '[[', ']]')
+    return ''.join(trozos)
+
+def plantillaATexto(plantilla):
+    """Texto de las plantillas que se conservan en los valores y párrafos (listas); el resto se quita"""
+
+    nombre, posicionales, _ = leerPlantilla(plantilla)
+
+    if nombre in PLANTILLAS_LISTA:
+        elementos = [re.sub(r'^\s*\*\s*', '', linea) for parametro in posicionales for linea in parametro.split('\n')]
+        return ', '.join(elemento for elemento in elementos if elemento.strip())
+
+    return ''
+
+def enlacesAHtml(texto):
+    """Escapa el texto y convierte los enlaces [[Destino|texto]] en <a href="/wiki/Destino"> y quita las negritas/cursivas"""
+
+    texto = re.sub(r"'{2,}", '', texto)
+
+    trozos = []
+    i = 0
+    for enlace in re.finditer(r'\[\[([^\[\]|]+)(?:\|([^\[\]]*))?\]\]', texto):
+        trozos.append(html.escape(texto[i:enlace.start()]))
+        destino = enlace.group(1).strip()
+        visible = enlace.group(2) if enlace.group(2) is not None else destino
+        href = '/wiki/' + quote(destino.replace(' ', '_'), safe='()_,:')
+        trozos.append(f'<a href="{html.escape(href)}">{html.escape(visible)}</a>')
+        i = enlace.end()
+    trozos.append(html.escape(texto[i:]))
+
+    return ''.join(trozos)
+
+def fechaNacimiento(valor):
+    """Devuelve (fecha ISO o None, texto visible) del parámetro birth_date de un infobox"""
+
+    plantillas = []
+    sustituirPlantillas(valor, lambda plantilla: plantillas.append(plantilla) or '')
+
+    for plantilla in plantillas:
+        nombre, posicionales, _ = leerPlantilla(plantilla)
+        numeros = [p for p in posicionales if p.isdigit()]
+        if nombre in PLANTILLAS_NACIMIENTO and len(numeros) >= 3:
+            try:
+                fecha = date(int(numeros[0]), int(numeros[1]), int(numeros[2]))
+                return fecha.isoformat(), f"{fecha.strftime('%B')} {fecha.day}, {fecha.year}"
+            except ValueError:
+                pass
+
+    return None, sustituirPlantillas(valor, plantillaATexto).strip()
+
+def extraerInfobox(wikitexto):
+    """Devuelve (parámetros del infobox, wikitexto sin el infobox). Los parámetros van en un diccionario
+    nombre -> valor en wikitexto; si el artículo no tiene infobox el diccionario está vacío"""
+
+    inicio = re.search(r'\{\{\s*Infobox', wikitexto, flags=re.I)
+    if inicio is None:
+        return {}, wikitexto
+
+    fin = buscarCierre(wikitexto, inicio.start(), '{{', '}}')
+    _, _, parametros = leerPlantilla(wikitexto[inicio.start():fin])
+
+    return parametros, wikitexto[:inicio.start()] + wikitexto[fin:]
+
+def infoboxAHtml(parametros):
+    """Construye la tabla 'infobox vcard' con la fila Born (fecha y lugar) y las filas de ETIQUETAS_INFOBOX"""
+
+    filas = []
+
+    # La fila Born va primero, como en la web (getBirthday lee la primera td.infobox-data si no hay bday)
+    if parametros.get('birth_date') or parametros.get('birth_place'):
+        iso, visible = fechaNacimiento(parametros.get('birth_date', ''))
+        celda = f'<span style="display:none">(<span class="bday">{iso}</span>)</span>' if iso else ''
+        celda += html.escape(visible)
+
+        lugar = sustituirPlantillas(parametros.get('birth_place', ''), plantillaATexto).strip()
+        if lugar:
+            celda += '<br/>' + enlacesAHtml(lugar)
+
+        filas.append(f'<tr><th class="infobox-label">Born</th><td class="infobox-data">{celda}</td></tr>')
+
+    for parametro, etiqueta in ETIQUETAS_INFOBOX.items():
+        valor = sustituirPlantillas(parametros.get(parametro, ''), plantillaATexto).strip()
+        if valor:
+            filas.append(f'<tr><th class="infobox-label">{etiqueta}</th><td class="infobox-data">{enlacesAHtml(valor)}</td></tr>')
+
+    return '<table class="infobox vcard"><tbody>' + ''.join(filas) + '</tbody></table>'
+
+def cuerpoAHtml(wikitexto):
+    """Convierte el texto del artículo (sin plantillas ni archivos) en encabezados, párrafos y listas"""
+
+    bloques = []
+    parrafo = []
+
+    def cerrarParrafo():
+        if parrafo:
+            bloques.append('<p>' + enlacesAHtml(' '.join(parrafo)) + '</p>')
+            parrafo.clear()
+
+    for linea in wikitexto.split('\n'):
+        linea = linea.strip()
+        encabezado = re.fullmatch(r'(=+)\s*(.*?)\s*\1', linea)
+
+        if not linea:
+            cerrarParrafo()
+        elif encabezado:
+            cerrarParrafo()
+            bloques.append(f'<h2>{enlacesAHtml(encabezado.group(2))}</h2>')
+        elif linea[0] in '*#':
+            cerrarParrafo()
+            bloques.append('<ul><li>' + enlacesAHtml(linea.lstrip('*#: ')) + '</li></ul>')
+        elif linea[0] not in '|!{}':
+            parrafo.append(linea)
+
+    cerrarParrafo()
+    return ''.join(bloques)
+
+def wikitextoAHtml(wikitexto):
+    """Convierte el wikitexto de un artículo en el html mínimo que esperan las funciones de autoresWikipedia"""
+
+    wikitexto = quitarComentarios(wikitexto)
+    parametros, resto = extraerInfobox(wikitexto)
+
+    resto = quitarArchivos(sustituirPlantillas(resto, plantillaATexto))
+    infobox = infoboxAHtml(parametros) if parametros else ''
+
+    return ('<html><body><div id="mw-content-text"><div class="mw-content-ltr mw-parser-output">'
+            + infobox + cuerpoAHtml(resto) + '</div></div></body></html>')
+
+class DumpWikipedia:
+    """Volcado multistream de Wikipedia. El índice (offset:id:título por línea) se carga en memoria;
+    cada consulta descomprime solo el bloque de ~100 páginas que contiene el artículo"""
+
+    def __init__(self, ruta_dump, ruta_indice):
+        self.ruta_dump = ruta_dump
+        self.posiciones = {}
+
+        abrir = bz2.open if ruta_indice.endswith('.bz2') else open
+        with abrir(ruta_indice, 'rt', encoding='utf-8') as f:
+            for linea in f:
+                offset, _, titulo = linea.rstrip('\n').split(':', 2)
+                self.posiciones[titulo] = int(offset)
+
+        # Inicio de cada bloque, para saber dónde termina el anterior
+        self.inicios = sorted(set(self.posiciones.values()))
+        self.tam_dump = os.path.getsize(ruta_dump)
+
+        self.bloques = OrderedDict()
+        self.lock = threading.Lock()
+
+    def leerBloque(self, offset):
+        """Devuelve las páginas (título -> elemento page) del bloque que empieza en offset"""
+
+        with self.lock:
+            if offset in self.bloques:
+                self.bloques.move_to_end(offset)
+                return self.bloques[offset]
+
+        siguiente = bisect.bisect_right(self.inicios, offset)
+        fin = self.inicios[siguiente] if siguiente < len(self.inicios) else self.tam_dump
+
+        with open(self.ruta_dump, 'rb') as f:
+            f.seek(offset)
+            datos = bz2.decompress(f.read(fin - offset))
+
+        raiz = etree.fromstring(b'<pages>' + datos + b'</pages>', etree.XMLParser(huge_tree=True, recover=True))
+        paginas = {pagina.findtext('title'): pagina for pagina in raiz.iter('page')}
+
+        with self.lock:
+            self.bloques[offset] = paginas
+            while len(self.bloques) > TAM_CACHE_BLOQUES:
+                self.bloques.popitem(last=False)
+
+        return paginas
+
+    def getWikitexto(self, titulo):
+        """Devuelve el wikitexto del artículo (siguiendo las redirecciones) o None si no está en el volcado"""
+
+        titulo = normalizarTitulo(titulo)
+
+        for _ in range(MAX_REDIRECCIONES + 1):
+            offset = self.posiciones.get(titulo)
+            if offset is None:
+                return None
+
+            pagina = self.leerBloque(offset).get(titulo)
+            if pagina is None:
+                return None
+
+            redireccion = pagina.find('redirect')
+            if redireccion is None:
+                return pagina.findtext('revision/text') or ''
+
+            titulo = normalizarTitulo(redireccion.get('title'))
+
+        return None
+
+    def getHtml(self, titulo):
+        wikitexto = self.getWikitexto(titulo)
+        return wikitextoAHtml(wikitexto) if wikitexto is not None else None
+
+class TablaWikitexto:
+    """Tabla ya extraída (csv o parquet) con las columnas Title y Wikitext de los artículos de autores
+    (basta con el infobox y la introducción) y, opcionalmente, Redirect con el destino de las redirecciones"""
+
+    def __init__(self, ruta):
+        df = pd.read_parquet(ruta) if ruta.endswith('.parquet') else pd.read_csv(ruta)
+
+        self.textos = dict(zip(df['Title'].map(normalizarTitulo), df['Wikitext']))
+        self.redirecciones = {}
+        if 'Redirect' in df.columns:
+            df = df.dropna(subset=['Redirect'])
+            self.redirecciones = dict(zip(df['Title'].map(normalizarTitulo), df['Redirect'].map(normalizarTitulo)))
+
+    def getWikitexto(self, titulo):
+        titulo = normalizarTitulo(titulo)
+
+        for _ in range(MAX_REDIRECCIONES):
+            if titulo not in self.redirecciones:
+                break
+            titulo = self.redirecciones[titulo]
+
+        texto = self.textos.get(titulo)
+        return texto if isinstance(texto, str) else None
+
+    def getHtml(self, titulo):
+        wikitexto = self.getWikitexto(titulo)
+        return wikitextoAHtml(wikitexto) if wikitexto is not None else None
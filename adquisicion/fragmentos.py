@@ -0,0 +1,180 @@
+import hashlib
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Módulo para repartir los procesos de enriquecimiento largos en fragmentos. El dataframe de
+# entrada se divide en N fragmentos cuyo estado y rango de filas se guardan en un manifiesto;
+# cada fragmento terminado se escribe en su propio fichero, de modo que al relanzar el proceso
+# (o desde otra máquina que comparta la carpeta) solo se procesan los fragmentos pendientes
+
+# --- CONSTANTES ---
+
+MANIFIESTO = "manifiesto.json"
+ENTRADA = "entrada.pkl"
+
+PENDIENTE = "pendiente"
+COMPLETADO = "completado"
+
+# --- FUNCIONES ---
+
+def rutaManifiesto(ruta_carpeta):
+    return os.path.join(ruta_carpeta, MANIFIESTO)
+
+def escribirAtomico(ruta, escribir):
+    """Escribe un fichero a través de uno temporal para que nunca quede a medias si el proceso se interrumpe"""
+
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    escribir(ruta_tmp)
+    os.replace(ruta_tmp, ruta)
+
+def guardarManifiesto(ruta_carpeta, manifiesto):
+    def escribir(ruta):
+        with open(ruta, "w") as f:
+            json.dump(manifiesto, f, indent=2)
+
+    escribirAtomico(rutaManifiesto(ruta_carpeta), escribir)
+
+def leerManifiesto(ruta_carpeta):
+    """Lee el manifiesto y actualiza el estado de cada fragmento según exista o no su fichero de salida"""
+
+    with open(rutaManifiesto(ruta_carpeta)) as f:
+        manifiesto = json.load(f)
+
+    for fragmento in manifiesto["fragmentos"]:
+        if os.path.exists(os.path.join(ruta_carpeta, fragmento["archivo"])):
+            fragmento["estado"] = COMPLETADO
+        else:
+            fragmento["estado"] = PENDIENTE
+
+    return manifiesto
+
+def huellaDataFrame(df):
+    """Devuelve una huella (hash) del contenido del dataframe: columnas, índice y valores"""
+
+    try:
+        hashes = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Columnas con listas (géneros, autores...) no se pueden hashear directamente
+        hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+
+    huella = hashlib.sha256(json.dumps([str(columna) for columna in df.columns]).encode())
+    huella.update(hashes.to_numpy().tobytes())
+    return huella.hexdigest()
+
+def crearFragmentos(df, ruta_carpeta, n_fragmentos):
+    """Divide el dataframe en n_fragmentos de filas consecutivas y guarda la entrada y el manifiesto.
+    Si la carpeta ya tiene un manifiesto para la misma entrada (mismo contenido y número de fragmentos)
+    se reutiliza (reanudación)"""
+
+    os.makedirs(ruta_carpeta, exist_ok=True)
+
+    huella = huellaDataFrame(df)
+
+    if os.path.exists(rutaManifiesto(ruta_carpeta)):
+        manifiesto = leerManifiesto(ruta_carpeta)
+        # Los manifiestos sin huella se comparan con la entrada que guardaron
+        huella_manifiesto = manifiesto.get("huella") or huellaDataFrame(pd.read_pickle(os.path.join(ruta_carpeta, ENTRADA)))
+        if manifiesto["num_filas"] == len(df) and len(manifiesto["fragmentos"]) == n_fragmentos and huella_manifiesto == huella:
+            return manifiesto
+        raise ValueError(f"La carpeta {ruta_carpeta} ya tiene un manifiesto para otra entrada")
+
+    # Guardamos la entrada para que todos los procesos y máquinas trabajen sobre los mismos datos
+    escribirAtomico(os.path.join(ruta_carpeta, ENTRADA), lambda ruta: df.to_pickle(ruta))
+
+    tam = math.ceil(len(df) / n_fragmentos) if n_fragmentos else 0
+    fragmentos = []
+    for i in range(n_fragmentos):
+        fragmentos.append({
+            "id": i,
+            "inicio": min(i * tam, len(df)),
+            "fin": min((i + 1) * tam, len(df)),
+            "archivo": f"fragmento_{i:04d}.pkl",
+            "estado": PENDIENTE
+        })
+
+    manifiesto = {"num_filas": len(df), "huella": huella, "fragmentos": fragmentos}
+    guardarManifiesto(ruta_carpeta, manifiesto)
+
+    return manifiesto
+
+def resolverFuncion(funcion):
+    """Admite la función o su nombre completo ('modulo.funcion') para poder lanzarla desde la línea de comandos"""
+
+    if callable(funcion):
+        return funcion
+
+    modulo, nombre = funcion.rsplit(".", 1)
+    return getattr(importlib.import_module(modulo), nombre)
+
+def procesarFragmento(ruta_carpeta, fragmento, funcion):
+    """Aplica la función a las filas de un fragmento y guarda el resultado. Devuelve el id del fragmento"""
+
+    df = pd.read_pickle(os.path.join(ruta_carpeta, ENTRADA))
+    resultado = resolverFuncion(funcion)(df.iloc[fragmento["inicio"]:fragmento["fin"]])
+
+    escribirAtomico(os.path.join(ruta_carpeta, fragmento["archivo"]), lambda ruta: resultado.to_pickle(ruta))
+
+    return fragmento["id"]
+
+def ejecutarFragmentos(df, funcion, ruta_carpeta, n_fragmentos = 10, procesos = 1, ids = None):
+    """Procesa con la función (que recibe y devuelve un dataframe) los fragmentos pendientes del dataframe.
+    Con procesos > 1 se reparten entre varios procesos (la función debe poder importarse desde su módulo).
+    Con ids solo se procesan esos fragmentos, lo que permite repartirlos entre máquinas que compartan
+    la carpeta. Los fragmentos ya completados se saltan. Devuelve el manifiesto actualizado"""
+
+    manifiesto = crearFragmentos(df, ruta_carpeta, n_fragmentos)
+
+    pendientes = [fragmento for fragmento in manifiesto["fragmentos"]
+                  if fragmento["estado"] == PENDIENTE and (ids is None or fragmento["id"] in ids)]
+
+    print(f"Fragmentos pendientes: {len(pendientes)} de {len(manifiesto['fragmentos'])}")
+
+    def marcarCompletado(id_fragmento):
+        manifiesto = leerManifiesto(ruta_carpeta)
+        manifiesto["fragmentos"][id_fragmento]["completado_en"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        guardarManifiesto(ruta_carpeta, manifiesto)
+        print(f"Fragmento {id_fragmento} completado")
+
+    if procesos > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            futuros = [executor.submit(procesarFragmento, ruta_carpeta, fragmento, funcion) for fragmento in pendientes]
+            for futuro in as_completed(futuros):
+                marcarCompletado(futuro.result())
+    else:
+        for fragmento in pendientes:
+            marcarCompletado(procesarFragmento(ruta_carpeta, fragmento, funcion))
+
+    return leerManifiesto(ruta_carpeta)
+
+def unirFragmentos(ruta_carpeta):
+    """Une los resultados de todos los fragmentos en orden de id. Falla si queda alguno pendiente"""
+
+    manifiesto = leerManifiesto(ruta_carpeta)
+
+    pendientes = [fragmento["id"] for fragmento in manifiesto["fragmentos"] if fragmento["estado"] == PENDIENTE]
+    if pendientes:
+        raise ValueError(f"Quedan fragmentos pendientes: {pendientes}")
+
+    resultados = [pd.read_pickle(os.path.join(ruta_carpeta, fragmento["archivo"])) for fragmento in manifiesto["fragmentos"]]
+
+    return pd.concat(resultados)
+
+if __name__ == "__main__":
+    """
+    Procesa fragmentos de una carpeta ya creada desde otra máquina o proceso:
+    python -m adquisicion.fragmentos ruta_carpeta modulo.funcion [id1 id2 ...]
+    """
+    ruta, nombre_funcion = sys.argv[1], sys.argv[2]
+    ids_fragmentos = [int(i) for i in sys.argv[3:]] or None
+
+    with open(rutaManifiesto(ruta)) as f:
+        num_fragmentos = len(json.load(f)["fragmentos"])
+
+    ejecutarFragmentos(pd.read_pickle(os.path.join(ruta, ENTRADA)), nombre_funcion, ruta, num_fragmentos, ids=ids_fragmentos)
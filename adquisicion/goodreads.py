@@ -1,15 +1,35 @@
-import requests
 from PIL import Image
+import numpy as np
 from io import BytesIO
 import re
-from bs4 import BeautifulSoup
-from selenium import webdriver
+import json
+from datetime import datetime, timezone
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 
+from lxml import etree
+import pandas as pd
+
+import adquisicion.clienteHTTP as clienteHTTP
+import adquisicion.concurrencia as concurrencia
+import adquisicion.parseo as parseo
+import adquisicion.poolNavegadores as poolNavegadores
+
+# Lado máximo (en píxeles) al que se reduce la portada antes de analizar su color
+TAM_ANALISIS_COLOR = 256
+
+# Número de intervalos de los histogramas de color
+BINS_HISTOGRAMA_COLOR = 16
+
+# Clase del encabezado con la saga del libro
+CLASE_SAGA = 'Text Text__title3 Text__italic Text__regular Text__subdued'
+
+# De la página de búsqueda solo se parsea la tabla de resultados
+FILTRO_BUSQUEDA = parseo.crearFiltro('table', class_='tableList')
+
 def getRating(soup_libro):
     """Devuelve el rating actual del libro""" 
 
@@ -76,7 +96,7 @@ def getDatePublished(soup_libro):
 def getSagaName(soup_libro):
     """Devuelve el nombre de la saga del libro. Si no pertenece a una saga devuelve NaN"""
     
-    h3_element = soup_libro.find('h3', {'class':'Text Text__title3 Text__italic Text__regular Text__subdued'})
+    h3_element = soup_libro.find('h3', {'class': CLASE_SAGA})
 
     if h3_element:
         saga_info = h3_element.text.strip().split(' ')
@@ -89,7 +109,7 @@ def getSagaName(soup_libro):
 def getSagaNumber(soup_libro):
     """Devuelve el número del libro en la saga a la que pertenece. Si no pertenece a una saga devuelve NaN"""
     
-    h3_element = soup_libro.find('h3', {'class':'Text Text__title3 Text__italic Text__regular Text__subdued'})
+    h3_element = soup_libro.find('h3', {'class': CLASE_SAGA})
 
     if h3_element:
         saga_info = h3_element.text.strip().split(' ')
@@ -98,117 +118,444 @@ def getSagaNumber(soup_libro):
         return saga_number
     else:
         return "NaN"
-    
-def getNumAwards(url_libro, date):
-    """Devuelve un diccionario con el número de premios literarios que ha ganado un libro antes de ser bestseller"""
-    
-    try:
-        # Inicializar el navegador (tener el driver correspondiente, como ChromeDriver)
-        driver = webdriver.Chrome()
 
-        # Abrir la página web
-        driver.get(url_libro)
+def getContributors(soup_libro):
+    """Devuelve los autores (contribuidores) del libro como una lista de tuplas (nombre, url del perfil).
+    Si la página no tiene la lista de autores devuelve una lista vacía"""
 
-        # Si aparece una pestaña de "Discover and Read More", la cerramos
-        puedeAparecerSpam = True
-        if puedeAparecerSpam:
+    lista_contribuidores = soup_libro.find('div', class_='ContributorLinksList')
 
-            try:
-                boton_close = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "Button--transparent"))
-                )
-                boton_close.click()
-                puedeAparecerSpam = False
-            except Exception as e:
-                print("No ha aparecido la pestaña 'Discover'")
-
-        # Encontramos el botón desplegable que contiene los premios y hacemos click en él
-        button = driver.find_element(By.XPATH, "//button[@aria-label='Book details and editions']")
+    if lista_contribuidores is None:
+        return []
+
+    contribuidores = []
+    for enlace in lista_contribuidores.find_all('a', {'class':'ContributorLink'}):
+        nombre = enlace.find('span', class_='ContributorLink__name')
+        contribuidores.append((nombre.text if nombre else enlace.text.strip(), enlace.get('href')))
+
+    return contribuidores
+    
+def getNumAwardsNavegador(url_libro, date):
+    """Devuelve un diccionario con el número de premios literarios que ha ganado un libro antes de ser bestseller,
+    abriendo la página en Chrome y desplegando el panel de detalles"""
+    
+    try:
+        # Tomamos prestado un navegador del pool (se devuelve al salir del bloque)
+        with poolNavegadores.navegador() as driver:
+
+            # Abrir la página web
+            driver.get(url_libro)
+
+            # Si aparece una pestaña de "Discover and Read More", la cerramos
+            puedeAparecerSpam = True
+            if puedeAparecerSpam:
+
+                try:
+                    boton_close = WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "Button--transparent"))
+                    )
+                    boton_close.click()
+                    puedeAparecerSpam = False
+                except Exception as e:
+                    print("No ha aparecido la pestaña 'Discover'")
+
+            # Encontramos el botón desplegable que contiene los premios y hacemos click en él
+            button = driver.find_element(By.XPATH, "//button[@aria-label='Book details and editions']")
         
-        # Nos desplazamos hacia el elemento
-        actions = ActionChains(driver)
-        actions.move_to_element(button).perform()
+            # Nos desplazamos hacia el elemento
+            actions = ActionChains(driver)
+            actions.move_to_element(button).perform()
             
-        button.click()
-
-        # Hacemos click en el botón "Show more" si aparece
-        try:
-            button = driver.find_element(By.XPATH, "//button[@aria-label='Show more Literary awards']")
             button.click()
-        except NoSuchElementException:
-            print("El botón 'Show more Literary awards' no fue encontrado")
 
-        # Obtenemos todos los premios
-        awards = driver.find_elements(By.XPATH, "//span[@data-testid='award']")
+            # Hacemos click en el botón "Show more" si aparece
+            try:
+                button = driver.find_element(By.XPATH, "//button[@aria-label='Show more Literary awards']")
+                button.click()
+            except NoSuchElementException:
+                print("El botón 'Show more Literary awards' no fue encontrado")
+
+            # Obtenemos todos los premios
+            awards = driver.find_elements(By.XPATH, "//span[@data-testid='award']")
 
-        # Inicializamos el contador
-        num_premios = 0
+            # Inicializamos el contador
+            num_premios = 0
 
-        # Para cada premio recibido
-        for award_element in awards:
+            # Para cada premio recibido
+            for award_element in awards:
 
-            # Obtenemos el texto
-            award_text = award_element.text
+                # Obtenemos el texto
+                award_text = award_element.text
           
-            # Extraemos el año del premio
-            award_year = int(award_text.split("(")[-1].split(")")[0])
+                # Extraemos el año del premio
+                award_year = int(award_text.split("(")[-1].split(")")[0])
         
-            # Si el premio es anterior a la fecha en la que el libro fue bestseller, incrementamos el contador
-            year = date.year
-            if award_year < year:
-                num_premios += 1
-
-        # Cerrar el navegador
-        driver.quit()
+                # Si el premio es anterior a la fecha en la que el libro fue bestseller, incrementamos el contador
+                year = date.year
+                if award_year < year:
+                    num_premios += 1
 
         return {'NumAwards': num_premios}
     except Exception as e:
         return {'NumAwards': 0}
 
 
-def getColorPercentage(url):
+def getNumAwards(url_libro, date, usarNavegador = False):
+    """Devuelve un diccionario con el número de premios literarios que ha ganado un libro antes de ser bestseller.
+    Los premios se leen del JSON embebido en la página (si getInfoLibro ya la descargó, sale de la caché).
+    Con usarNavegador=True se recurre a Chrome cuando la página no trae el JSON"""
+
+    try:
+        response = clienteHTTP.get(url_libro)
+
+        if response.status_code == 200:
+            premios = extraerInfoLibroJSON(response.text)['Awards']
+            return {'NumAwards': contarPremios(premios, date)}
+    except Exception as e:
+        print(f"No se han podido leer los premios del JSON: {e}")
+
+    if usarNavegador:
+        return getNumAwardsNavegador(url_libro, date)
+
+    return {'NumAwards': 0}
+
+def contarPremios(premios, date):
+    """Cuenta los premios (lista de (nombre, año)) anteriores al año de la fecha dada"""
+
+    return sum(1 for _, award_year in premios if award_year is not None and award_year < date.year)
+
+def analizarColores(img, estadisticas = False):
+    """Calcula la presencia media de cada color de una imagen (de 0 a 1). Con estadisticas=True
+    añade el histograma de cada canal, el brillo y la saturación medios"""
+
+    # Decodificamos directamente a menor tamaño (solo tiene efecto en JPEG) y pasamos a RGB
+    # para tratar igual las portadas RGBA, con paleta o en escala de grises
+    img.draft('RGB', (TAM_ANALISIS_COLOR, TAM_ANALISIS_COLOR))
+    img = img.convert('RGB')
+
+    factor = max(img.size) // TAM_ANALISIS_COLOR
+    if factor > 1:
+        img = img.reduce(factor)
+
+    pixels = np.asarray(img).reshape(-1, 3)
+
+    # Calculamos el porcentaje de cada color
+    porcentaje_rojo, porcentaje_verde, porcentaje_azul = (round(float(media), 2) for media in pixels.mean(axis=0) / 255)
+
+    resultado = {
+        "porcentaje_rojo": porcentaje_rojo,
+        "porcentaje_verde": porcentaje_verde,
+        "porcentaje_azul": porcentaje_azul
+    }
+
+    if estadisticas:
+        # Histograma normalizado de cada canal
+        for i, color in enumerate(["rojo", "verde", "azul"]):
+            histograma = np.bincount(pixels[:, i] // (256 // BINS_HISTOGRAMA_COLOR), minlength=BINS_HISTOGRAMA_COLOR)
+            resultado["histograma_" + color] = (histograma / len(pixels)).round(4).tolist()
+
+        # Brillo (luminancia) y saturación (HSV) medios
+        maximo = pixels.max(axis=1).astype(np.float64)
+        minimo = pixels.min(axis=1)
+        saturacion = np.divide(maximo - minimo, maximo, out=np.zeros_like(maximo), where=maximo > 0)
+
+        resultado["brillo"] = round(float((pixels @ np.array([0.299, 0.587, 0.114])).mean() / 255), 2)
+        resultado["saturacion"] = round(float(saturacion.mean()), 2)
+
+    return resultado
+
+def getColorPercentage(url, estadisticas = False):
     """Analiza la presencia de color en la portada de un libro"""
     
     # Descargamos la imagen desde la URL
-    response = requests.get(url)
-    
-    porcentaje_rojo = None
-    porcentaje_verde = None
-    porcentaje_azul = None
+    response = clienteHTTP.get(url)
         
     if response.status_code == 200:
-        
         img = Image.open(BytesIO(response.content))
+        return analizarColores(img, estadisticas)
+
+    return {
+        "porcentaje_rojo": None,
+        "porcentaje_verde": None,
+        "porcentaje_azul": None
+    }
+
+def extraerInfoLibroDOM(html):
+    """Extrae la información de la página de un libro recorriendo el árbol de BeautifulSoup
+    con una búsqueda por campo"""
 
-        # Obtenemos los píxeles de la imagen
-        pixels = img.getdata()
+    soup_libro = parseo.crearSoup(html)
 
-        # Inicializamos contadores para cada color
-        conteo_rojo = conteo_verde = conteo_azul = 0
+    img_tag = soup_libro.find('img', {'class': 'ResponsiveImage'})
 
-        # Contamos la cantidad de píxeles de cada color
-        for pixel in pixels:
-            r, g, b = pixel
-            conteo_rojo += r
-            conteo_verde += g
-            conteo_azul += b
+    return {
+        'Rating': getRating(soup_libro),
+        'NumPages': getNumPages(soup_libro),
+        'GenresList': getGenresList(soup_libro),
+        'Type': getType(soup_libro),
+        'DatePublished': getDatePublished(soup_libro),
+        'SagaName': getSagaName(soup_libro),
+        'SagaNumber': getSagaNumber(soup_libro),
+        'ImgSrc': img_tag.get('src') if img_tag else None,
+        'Contributors': getContributors(soup_libro)
+    }
+
+class _ExtractorLibro:
+    """Target de lxml que recorre la página de un libro una sola vez (sin construir el árbol)
+    y guarda únicamente el texto de los nodos que usa getInfoLibro"""
+
+    def __init__(self):
+        self.textos = {}
+        self.generos = []
+        self.hay_generos = False
+        self.img_src = None
+        # Capturas abiertas: [campo, profundidad, fragmentos de texto]
+        self.abiertas = []
+        self.en_generos = 0
+        # Autores de la primera ContributorLinksList: [nombre, texto del enlace, url]
+        self.contribuidores = []
+        self.hay_contribuidores = False
+        self.en_contribuidores = 0
+
+    def campoNodo(self, tag, attrib):
+        """Devuelve el campo al que corresponde un nodo, o None si no interesa"""
+
+        clases = attrib.get('class', '').split()
+
+        if tag == 'div' and 'RatingStatistics__rating' in clases:
+            return 'rating'
+        if tag == 'p' and attrib.get('data-testid') in ('pagesFormat', 'publicationInfo'):
+            return attrib['data-testid']
+        if tag == 'h3' and ' '.join(clases) == CLASE_SAGA:
+            return 'saga'
+        if tag == 'span' and self.en_generos and 'Button__labelItem' in clases:
+            return 'genero'
+        if tag == 'a' and self.en_contribuidores and 'ContributorLink' in clases:
+            return 'contribuidor'
+        if tag == 'span' and 'ContributorLink__name' in clases and any(c[0] == 'contribuidor' for c in self.abiertas):
+            return 'nombreContribuidor'
+        return None
 
-        # Calculamos el porcentaje de cada color
-        total_pixeles = len(pixels)
-        porcentaje_rojo = round((conteo_rojo / (total_pixeles * 255)), 2)
-        porcentaje_verde = round((conteo_verde / (total_pixeles * 255)), 2)
-        porcentaje_azul = round((conteo_azul / (total_pixeles * 255)), 2)
+    def start(self, tag, attrib):
+        for captura in self.abiertas:
+            captura[1] += 1
+
+        if self.en_generos:
+            self.en_generos += 1
+        elif tag == 'ul' and not self.hay_generos and 'CollapsableList' in attrib.get('class', '').split() \
+                and attrib.get('aria-label') == 'Top genres for this book':
+            self.en_generos = 1
+            self.hay_generos = True
+
+        if self.en_contribuidores:
+            self.en_contribuidores += 1
+        elif tag == 'div' and not self.hay_contribuidores and 'ContributorLinksList' in attrib.get('class', '').split():
+            self.en_contribuidores = 1
+            self.hay_contribuidores = True
+
+        if tag == 'img' and self.img_src is None and 'ResponsiveImage' in attrib.get('class', '').split():
+            self.img_src = attrib.get('src')
+
+        campo = self.campoNodo(tag, attrib)
+
+        if campo == 'contribuidor':
+            self.contribuidores.append([None, None, attrib.get('href')])
+
+        # Solo nos quedamos con la primera aparición de cada campo (igual que soup.find), salvo en las listas
+        if campo in ('genero', 'contribuidor', 'nombreContribuidor') or (campo and campo not in self.textos):
+            self.abiertas.append([campo, 1, []])
+
+    def end(self, tag):
+        if self.en_generos:
+            self.en_generos -= 1
+        if self.en_contribuidores:
+            self.en_contribuidores -= 1
+
+        for captura in self.abiertas:
+            captura[1] -= 1
+
+        while self.abiertas and self.abiertas[-1][1] == 0:
+            campo, _, fragmentos = self.abiertas.pop()
+            texto = ''.join(fragmentos)
+            if campo == 'genero':
+                self.generos.append(texto)
+            elif campo == 'contribuidor':
+                self.contribuidores[-1][1] = texto
+            elif campo == 'nombreContribuidor':
+                # Como enlace.find, solo cuenta el primer nombre de cada enlace
+                if self.contribuidores[-1][0] is None:
+                    self.contribuidores[-1][0] = texto
+            else:
+                self.textos.setdefault(campo, texto)
+
+    def data(self, texto):
+        for captura in self.abiertas:
+            captura[2].append(texto)
+
+    def close(self):
+        return self
+
+def extraerInfoLibroRapido(html):
+    """Extrae la información de la página de un libro en una sola pasada del parser de lxml.
+    Devuelve lo mismo que extraerInfoLibroDOM"""
+
+    extractor = _ExtractorLibro()
+    parser = etree.HTMLParser(target=extractor)
+    parser.feed(html)
+    parser.close()
+
+    textos = extractor.textos
+
+    # Los campos obligatorios lanzan una excepción si no aparecen, igual que sus funciones get*
+    rating = float(textos['rating'])
+    num_pages = int(textos['pagesFormat'].split()[0])
+
+    if not extractor.hay_generos:
+        raise ValueError("No se ha encontrado la lista de géneros")
 
+    # El último género es ...more
+    genres = list(set(extractor.generos[:-1]))
+
+    formato = textos.get('pagesFormat')
+    book_type = None
+    if formato is not None:
+        split_result = formato.lower().split(', ')
+        if len(split_result) > 1:
+            book_type = split_result[1]
+
+    date_published = None
+    publicacion = textos.get('publicationInfo')
+    if publicacion is not None:
+        split_result = publicacion.lower().split('first published ')
+        if len(split_result) > 1:
+            date_published = split_result[1]
+
+    saga_name = saga_number = "NaN"
+    if 'saga' in textos:
+        saga_info = textos['saga'].strip().split(' ')
+        saga_name = ' '.join(saga_info[:-1])
+        saga_number = saga_info[-1].replace('#', '')
 
-    # Devolver los resultados
     return {
-        "porcentaje_rojo": porcentaje_rojo,
-        "porcentaje_verde": porcentaje_verde,
-        "porcentaje_azul": porcentaje_azul
+        'Rating': rating,
+        'NumPages': num_pages,
+        'GenresList': genres,
+        'Type': book_type,
+        'DatePublished': date_published,
+        'SagaName': saga_name,
+        'SagaNumber': saga_number,
+        'ImgSrc': extractor.img_src,
+        'Contributors': [(nombre if nombre is not None else texto.strip(), url)
+                         for nombre, texto, url in extractor.contribuidores]
     }
 
-def getInfoLibro(nombre_libro):
-    """Devuelve un diccionario con información de un libro dado"""
+def getNextData(html):
+    """Devuelve el JSON completo del script __NEXT_DATA__ de una página de GoodReads"""
+
+    inicio = html.index('<script id="__NEXT_DATA__"')
+    inicio = html.index('>', inicio) + 1
+    fin = html.index('</script>', inicio)
+
+    return json.loads(html[inicio:fin])
+
+def getDatosNextData(html):
+    """Devuelve el estado de Apollo embebido en el script __NEXT_DATA__ de una página de GoodReads"""
+
+    return getNextData(html)['props']['pageProps']['apolloState']
+
+def resolverRef(apollo, objeto):
+    """Sustituye una referencia de Apollo ({'__ref': clave}) por el objeto al que apunta"""
+
+    if isinstance(objeto, dict) and '__ref' in objeto:
+        return apollo.get(objeto['__ref'])
+    return objeto
+
+def getLibroApollo(apollo):
+    """Devuelve el objeto Book principal de la página a partir del estado de Apollo"""
+
+    # La consulta raíz apunta al libro de la página; las demás entradas Book son otras ediciones o recomendaciones
+    for clave, valor in apollo.get('ROOT_QUERY', {}).items():
+        if clave.startswith('getBookByLegacyId'):
+            return resolverRef(apollo, valor)
+
+    return next(valor for clave, valor in apollo.items() if clave.startswith('Book:') and valor.get('details'))
+
+def formatearFechaMs(ms):
+    """Convierte una fecha en milisegundos al formato de la página ('september 1, 2009')"""
+
+    fecha = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return f"{fecha.strftime('%B').lower()} {fecha.day}, {fecha.year}"
+
+def extraerInfoLibroJSON(html):
+    """Extrae la información de la página de un libro del JSON embebido (__NEXT_DATA__) sin recorrer el HTML.
+    Devuelve lo mismo que extraerInfoLibroDOM más la lista de premios ('Awards') como tuplas (nombre, año)"""
+
+    apollo = getDatosNextData(html)
+    libro = getLibroApollo(apollo)
+    obra = resolverRef(apollo, libro.get('work')) or {}
+
+    detalles_libro = libro.get('details') or {}
+    detalles_obra = obra.get('details') or {}
+
+    # Los campos obligatorios lanzan una excepción si no aparecen, igual que en el extractor 'dom'
+    rating = round(float(obra['stats']['averageRating']), 2)
+    num_pages = int(detalles_libro['numPages'])
+
+    genres = list(set(resolverRef(apollo, item['genre'])['name'] for item in libro.get('bookGenres') or []))
+
+    book_type = detalles_libro.get('format')
+    if book_type:
+        book_type = book_type.lower()
+
+    date_published = None
+    if detalles_obra.get('publicationTime'):
+        date_published = formatearFechaMs(detalles_obra['publicationTime'])
+
+    saga_name = saga_number = "NaN"
+    sagas = libro.get('bookSeries') or []
+    if sagas:
+        saga = resolverRef(apollo, sagas[0]['series'])
+        saga_name = saga['title']
+        saga_number = str(sagas[0].get('userPosition', ''))
+
+    # El autor principal y después el resto, en el mismo orden que la ContributorLinksList
+    aristas = [libro.get('primaryContributorEdge')] + (libro.get('secondaryContributorEdges') or [])
+    contribuidores = []
+    for arista in aristas:
+        contribuidor = resolverRef(apollo, arista.get('node')) if arista else None
+        if contribuidor:
+            contribuidores.append((contribuidor.get('name'), contribuidor.get('webUrl')))
+
+    premios = []
+    for premio in detalles_obra.get('awardsWon') or []:
+        award_year = None
+        if premio.get('awardedAt') is not None:
+            award_year = datetime.fromtimestamp(premio['awardedAt'] / 1000, tz=timezone.utc).year
+        premios.append((premio.get('name'), award_year))
+
+    return {
+        'Rating': rating,
+        'NumPages': num_pages,
+        'GenresList': genres,
+        'Type': book_type,
+        'DatePublished': date_published,
+        'SagaName': saga_name,
+        'SagaNumber': saga_number,
+        'ImgSrc': libro.get('imageUrl'),
+        'Contributors': contribuidores,
+        'Awards': premios
+    }
+
+# Extractores disponibles para la página de un libro
+EXTRACTORES = {
+    'dom': extraerInfoLibroDOM,
+    'rapido': extraerInfoLibroRapido,
+    'json': extraerInfoLibroJSON
+}
+
+def getInfoLibro(nombre_libro, extractor = 'dom'):
+    """Devuelve un diccionario con información de un libro dado. El parámetro extractor
+    indica cómo se analiza la página del libro ('dom', 'rapido' o 'json', ver EXTRACTORES)"""
     
     nombre_libro_formateado = re.sub(r"[!,*)@#%(&$_?.^'-]", '', nombre_libro).lower().replace(' ', '+')
     
@@ -216,12 +563,12 @@ def getInfoLibro(nombre_libro):
     url = "https://www.goodreads.com/search?q=" + nombre_libro_formateado
     
     try:
-        response = requests.get(url)
+        response = clienteHTTP.get(url)
         
         # Si la request tiene éxito
         if response.status_code == 200:
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parseo.crearSoup(response.text, FILTRO_BUSQUEDA)
 
             # Seleccionamos la tabla del html con los resultados de la búsqueda
             table = soup.select('.tableList')
@@ -238,35 +585,32 @@ def getInfoLibro(nombre_libro):
                 # Accedemos a la página del libro en goodreads
                 url_libro = "https://www.goodreads.com" + href_libro
                 print(url_libro)
-                response = requests.get(url_libro)
+                response = clienteHTTP.get(url_libro)
 
                 # Si la request tiene éxito
                 if response.status_code == 200:
 
-                    soup_libro = BeautifulSoup(response.text, "html.parser")
-
                     try:
                         
-                        # Obtenemos la presencia de color en la portada del libro
-                        img_tag = soup_libro.find('img', {'class': 'ResponsiveImage'})
+                        # Extraemos la información de la página con el extractor elegido
+                        info = EXTRACTORES[extractor](response.text)
 
-                        if img_tag:
-                            img_src = img_tag.get('src')
-                            
-                        porcentajesColores = getColorPercentage(img_src)
+                        # Obtenemos la presencia de color en la portada del libro
+                        porcentajesColores = getColorPercentage(info['ImgSrc'])
                         
                         return {
-                            'Rating': getRating(soup_libro),
-                            'NumPages': getNumPages(soup_libro),
-                            'GenresList': getGenresList(soup_libro),
-                            'Type': getType(soup_libro),
-                            'DatePublished': getDatePublished(soup_libro),
-                            'SagaName': getSagaName(soup_libro),
-                            'SagaNumber': getSagaNumber(soup_libro),
+                            'Rating': info['Rating'],
+                            'NumPages': info['NumPages'],
+                            'GenresList': info['GenresList'],
+                            'Type': info['Type'],
+                            'DatePublished': info['DatePublished'],
+                            'SagaName': info['SagaName'],
+                            'SagaNumber': info['SagaNumber'],
                             'RedPerc': porcentajesColores["porcentaje_rojo"],
                             'BluePerc': porcentajesColores["porcentaje_azul"],
                             'GreenPerc': porcentajesColores["porcentaje_verde"],
-                            'url': url_libro
+                            'url': url_libro,
+                            'Contributors': info['Contributors']
                         }
                     except Exception as e:
                         print(f"Error: {e}")
@@ -282,7 +626,8 @@ def getInfoLibro(nombre_libro):
                             'RedPerc': None,
                             'BluePerc': None,
                             'GreenPerc': None,
-                            'url': None
+                            'url': None,
+                            'Contributors': None
                         }
     except Exception as e:
         print(f"Error de conexión: {e}")
@@ -298,5 +643,21 @@ def getInfoLibro(nombre_libro):
         'RedPerc': None,
         'BluePerc': None,
         'GreenPerc': None,
-        'url': None
+        'url': None,
+        'Contributors': None
     }
+
+def getInfoLibros(titulos, max_workers = concurrencia.MAX_WORKERS, extractor = 'dom'):
+    """Obtiene en paralelo la información de GoodReads de una lista o Series de títulos.
+    Devuelve un dataframe con una fila por título, en el mismo orden (y con el mismo índice si es una Series)"""
+
+    indice = titulos.index if isinstance(titulos, pd.Series) else None
+
+    infos = concurrencia.procesarEnParalelo(
+        lambda titulo: getInfoLibro(titulo, extractor),
+        titulos,
+        max_workers=max_workers,
+        descripcion="Libros de GoodReads"
+    )
+
+    return pd.DataFrame(infos, index=indice)
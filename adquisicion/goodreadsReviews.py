@@ -1,26 +1,285 @@
 # https://playwright.dev/python/
 
 import asyncio
+import sys
 import time
 from playwright.async_api import async_playwright
 import re
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dateutil import parser
 
+import adquisicion.diario as diario
+import adquisicion.almacenReviews as almacenReviews
+
+# Csv con los libros limpios de los que se obtienen las reviews
+RUTA_LIBROS = '/Users/maria/Downloads/LIBROS_LIMPIOS.csv'
+
+# Diario en el que se anota el resultado de cada libro
+RUTA_DIARIO = "conRatings.jsonl"
+
+# Páginas que se procesan a la vez en el modo concurrente
+NUM_PAGINAS = 4
+
+# Páginas de reviews máximas que se cargan por libro en el modo API (la paginación suele
+# terminar antes, en cuanto aparece una review posterior a la fecha del libro)
+MAX_PAGINAS_API = 50
+
+# Días que se sigue paginando en el modo API después de la fecha del libro, para que el almacén
+# cubra también cortes posteriores (calcularRatingsLibros con dias_desplazamiento positivo)
+DIAS_MARGEN_API = 0
+
+# Segundos que se espera a cada respuesta de reviews en el modo API
+TIMEOUT_RESPUESTA_API = 30
+
+# Tipos de recurso y dominios de anuncios/analítica que no se descargan en el modo concurrente
+TIPOS_BLOQUEADOS = {"image", "media", "font"}
+DOMINIOS_BLOQUEADOS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "amazon-adsystem.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "scorecardresearch.com"
+)
+
+async def getRatingsLibro(page, row):
+    """Abre la página de reviews de un libro, las ordena de más antigua a más reciente y devuelve
+    (media, número) de los ratings publicados hasta la fecha del libro, la lista de reviews leídas (fecha, estrellas)
+    y si se han leído todas las reviews del libro (se ha llegado al final de la paginación)"""
+
+    browser_url = row['url']
+
+    print(browser_url)
+
+    await page.goto(browser_url, timeout=120000)
+    print('loaded')
+
+    el = page.get_by_text('More reviews and ratings')
+    print(el)
+    await el.dispatch_event('click', timeout=60000)
+
+    # El popup de inicio de sesión solo aparece la primera vez en cada contexto del navegador
+    try:
+        await page.locator('xpath=//html/body/div[3]/div/div[1]/div/div/button').click(timeout=10000)
+        print("popup closed")
+    except Exception as e:
+        print("No ha aparecido el popup")
+
+    await page.locator('xpath=//*[@id="__next"]/div[2]/main/div[1]/div[2]/div[4]/div[1]/div[2]/div/button').click()
+    print('Filters clicked')
+
+    el = page.get_by_text('Oldest first')
+    print(el)
+    await el.dispatch_event('click')
+    print('oldest first clicked')
+
+    el = page.locator('body > div.Overlay.Overlay--floating > div > div.Overlay__actions > div:nth-child(2) > button > span')
+    print(el)
+    await el.dispatch_event('click')
+    print('apply clicked')
+
+    # paginate
+    NUM_PAGES = 10
+    # Si el botón de cargar más deja de aparecer antes de NUM_PAGES se han leído todas las reviews
+    completo = False
+    for idx in range(NUM_PAGES):
+        try:
+            await page.locator('xpath=//*[@id="__next"]/div[2]/main/div[1]/div[2]/div[5]/div[4]/div/button').click()
+        except Exception as e:
+            print(e)
+            completo = True
+            break
+    print(idx)
+
+    # get all ratings
+    ratings = await page.locator('section.ReviewCard__row').all()
+
+    num_ratings = 0
+    sum_ratings = 0
+
+    # Todas las reviews leídas como (fecha, estrellas), para el almacén en bruto
+    reviews = []
+
+    for item in ratings:
+
+        rs = await item.locator('span').all()
+
+        if rs:
+            stars_text = await rs[0].get_attribute("aria-label")
+            if stars_text:
+                pattern = r'\b\d+\b'
+                numbers = re.findall(pattern, stars_text)
+
+                date_text = await rs[6].inner_text()
+
+                if date_text:
+                    try:
+                        review_date = datetime.strptime(date_text, '%B %d, %Y')
+                        limit_date = datetime.strptime(row['Date'], '%Y-%m-%d')
+
+                        if numbers:
+                            reviews.append((review_date, int(numbers[0])))
+
+                        if review_date <= limit_date and numbers:
+
+                            rating = int(numbers[0])
+                            num_ratings += 1
+                            sum_ratings += rating
+
+
+                    except ValueError:
+                        print(f"Error parsing date: {date_text}")
+                        continue
+            else:
+                print(f"stars_text is {stars_text}. Skipping this rating.")
+
+    if num_ratings == 0:
+        mean = None
+    else:
+        mean = sum_ratings / num_ratings
+
+    print(mean)
+
+    return mean, num_ratings, reviews, completo
+
+def getReviewsRespuesta(datos):
+    """Devuelve la lista de reviews (nodos) de una respuesta GraphQL de GoodReads, o None si la respuesta no es de reviews"""
+
+    if not isinstance(datos, dict):
+        return None
+
+    reviews = (datos.get('data') or {}).get('getReviews')
+    if reviews is None:
+        return None
+
+    return [edge['node'] for edge in reviews.get('edges') or [] if edge.get('node')]
+
+def getFechaReview(review):
+    """Devuelve la fecha (sin hora) de una review de la API"""
+
+    fecha = datetime.fromtimestamp(review['createdAt'] / 1000, tz=timezone.utc)
+    return datetime(fecha.year, fecha.month, fecha.day)
+
+async def getRatingsLibroAPI(page, row):
+    """Igual que getRatingsLibro, pero leyendo las reviews de las respuestas JSON que la página ya pide
+    a la API en lugar del DOM, y dejando de paginar en cuanto aparece una review posterior a la fecha
+    del libro más DIAS_MARGEN_API días (las reviews están ordenadas de más antigua a más reciente)"""
+
+    limit_date = datetime.strptime(row['Date'], '%Y-%m-%d')
+    fecha_parada = limit_date + timedelta(days=DIAS_MARGEN_API)
+
+    reviews = []
+    nuevas = asyncio.Queue()
+    ordenado = False
+    completo = False
+
+    async def capturarRespuesta(response):
+        if 'graphql' not in response.url:
+            return
+        try:
+            nodos = getReviewsRespuesta(await response.json())
+        except Exception:
+            return
+
+        # Descartamos las respuestas anteriores a ordenar por fecha
+        if nodos is not None and ordenado:
+            nuevas.put_nowait(nodos)
+
+    page.on("response", capturarRespuesta)
+
+    try:
+        print(row['url'])
+
+        await page.goto(row['url'], timeout=120000)
+
+        await page.get_by_text('More reviews and ratings').dispatch_event('click', timeout=60000)
+
+        # El popup de inicio de sesión solo aparece la primera vez en cada contexto del navegador
+        try:
+            await page.locator('xpath=//html/body/div[3]/div/div[1]/div/div/button').click(timeout=10000)
+        except Exception as e:
+            print("No ha aparecido el popup")
+
+        await page.locator('xpath=//*[@id="__next"]/div[2]/main/div[1]/div[2]/div[4]/div[1]/div[2]/div/button').click()
+        await page.get_by_text('Oldest first').dispatch_event('click')
+
+        ordenado = True
+        await page.locator('body > div.Overlay.Overlay--floating > div > div.Overlay__actions > div:nth-child(2) > button > span').dispatch_event('click')
+
+        for idx in range(MAX_PAGINAS_API):
+            try:
+                nodos = await asyncio.wait_for(nuevas.get(), timeout=TIMEOUT_RESPUESTA_API)
+            except asyncio.TimeoutError:
+                print("No han llegado más reviews")
+                break
+
+            reviews.extend(nodos)
+
+            if not nodos:
+                completo = True
+                break
+
+            # Si ya hay reviews posteriores a la fecha (más el margen), las siguientes también lo serán
+            if getFechaReview(nodos[-1]) > fecha_parada:
+                break
+
+            try:
+                await page.locator('xpath=//*[@id="__next"]/div[2]/main/div[1]/div[2]/div[5]/div[4]/div/button').click()
+            except Exception as e:
+                # Sin botón de cargar más ya no quedan reviews
+                print(e)
+                completo = True
+                break
+        print(idx)
+    finally:
+        # Las páginas se reutilizan entre libros, así que quitamos el listener
+        page.remove_listener("response", capturarRespuesta)
+
+    reviews = [(getFechaReview(review), review['rating']) for review in reviews if review.get('rating') and review.get('createdAt')]
+    ratings = [rating for review_date, rating in reviews if review_date <= limit_date]
+
+    num_ratings = len(ratings)
+    mean = sum(ratings) / num_ratings if num_ratings else None
+
+    print(mean)
+
+    return mean, num_ratings, reviews, completo
+
+# Formas de obtener los ratings de un libro
+MODOS = {
+    'dom': getRatingsLibro,
+    'api': getRatingsLibroAPI
+}
+
+def guardarRatings(df, index, row, mean, num_ratings, reviews, completo = False):
+    """Guarda las reviews en bruto del libro en el almacén (con hasta dónde cubren, ver almacenReviews.guardarReviews)
+    y sus ratings en el df y en el diario"""
+
+    book_id = almacenReviews.getIdLibro(row['url'])
+    if book_id is not None:
+        almacenReviews.guardarReviews(book_id, reviews, completo=completo)
+
+    # Sin ratings hasta la fecha del libro la media es None: se guarda NaN y el libro queda anotado igualmente
+    rating = round(mean, 2) if mean is not None else np.nan
+
+    df.at[index, 'Rating'] = rating
+    df.at[index, 'numRatings'] = num_ratings
+    diario.anotar(RUTA_DIARIO, {'Title': row['Title'], 'Author': row['Author'], 'Rating': rating, 'numRatings': num_ratings})
+
+def getLibrosPendientes(df):
+    """Devuelve las filas del df cuyos libros no se procesaron en ejecuciones anteriores"""
+
+    anotados = diario.clavesAnotadas(RUTA_DIARIO)
+    return [(index, row) for index, row in df.iterrows() if (row['Title'], row['Author']) not in anotados]
 
 # leer el df de libros, para cada fila hacer un link con el titulo, hacer todo eso y añadir los valores a las columnas. tener en cuenta la fecha para q la review sea valida y guardar todo al final en un csv
-async def main():
-    df = pd.read_csv('/Users/maria/Downloads/LIBROS_LIMPIOS.csv')
-    
-    numReviews = 0
-    
-    for index, row in df.iterrows():
-        titulo = row['Title']
-        browser_url = row['url']
-        
-        print(browser_url)
-        
+async def main(ruta_libros = RUTA_LIBROS, modo = 'dom'):
+    df = pd.read_csv(ruta_libros)
+
+    for index, row in getLibrosPendientes(df):
+
         try:
             async with async_playwright() as pw:
                 print('start');
@@ -31,101 +290,85 @@ async def main():
                         )
                 print('launched');
                 page = await browser.new_page()
-                await page.goto(browser_url, timeout=120000)
-                print('loaded')
 
-                el = page.get_by_text('More reviews and ratings')
-                print(el)
-                await el.dispatch_event('click', timeout=60000)
+                mean, num_ratings, reviews, completo = await MODOS[modo](page, row)
+                guardarRatings(df, index, row, mean, num_ratings, reviews, completo)
 
-
-                await page.locator('xpath=//html/body/div[3]/div/div[1]/div/div/button').click()
-                print("popup closed")
-
-
-                await page.locator('xpath=//*[@id="__next"]/div[2]/main/div[1]/div[2]/div[4]/div[1]/div[2]/div/button').click()
-                print('Filters clicked')
-
-                el = page.get_by_text('Oldest first')
-                print(el)
-                await el.dispatch_event('click')
-                print('oldest first clicked')
-
-                el = page.locator('body > div.Overlay.Overlay--floating > div > div.Overlay__actions > div:nth-child(2) > button > span')
-                print(el)
-                await el.dispatch_event('click')
-                print('apply clicked')
-
-                # paginate
-                NUM_PAGES = 10
-                for idx in range(NUM_PAGES):
-                    try:
-                        await page.locator('xpath=//*[@id="__next"]/div[2]/main/div[1]/div[2]/div[5]/div[4]/div/button').click()
-                    except Exception as e:
-                        print(e)
-                        break
-                print(idx)
-                
-                # get all ratings
-                ratings = await page.locator('section.ReviewCard__row').all()
-                
-                num_ratings = 0
-                sum_ratings = 0
-                
-                for item in ratings:
-                    
-                    rs = await item.locator('span').all()
-                    
-                    if rs:
-                        stars_text = await rs[0].get_attribute("aria-label")
-                        if stars_text:
-                            pattern = r'\b\d+\b'
-                            numbers = re.findall(pattern, stars_text)
-                            
-                            date_text = await rs[6].inner_text()
-                            
-                            if date_text:
-                                try:
-                                    review_date = datetime.strptime(date_text, '%B %d, %Y')
-                                    limit_date = datetime.strptime(row['Date'], '%Y-%m-%d')
-                                    
-                                    if review_date <= limit_date and numbers:
-
-                                        rating = int(numbers[0])
-                                        num_ratings += 1
-                                        sum_ratings += rating
-                                        
-                                            
-                                except ValueError:
-                                    print(f"Error parsing date: {date_text}")
-                                    continue
-                        else:
-                            print(f"stars_text is {stars_text}. Skipping this rating.")
-                       
-                if num_ratings == 0:
-                    mean = None
-                else:
-                    mean = sum_ratings / num_ratings
-                    
-                print(mean)
-                df.at[index, 'Rating'] = round(mean, 2)
-                df.at[index, 'numRatings'] = num_ratings
-                numReviews += 1
-                
                 print('sleep5')
                 await asyncio.sleep(5)
                 await browser.close()
                 print('Browser closed')
-                
-                if (numReviews == 10):
-                    numReviews = 0
-                    df.to_csv(f"conRatings.csv")
-                
-            
+
         except Exception as e:
             print(f"An error occurred for book: {str(e)}")
             continue
-                
-    df.to_csv(f"conRatings.csv")
 
-asyncio.run(main())
+    diario.compactar(df, RUTA_DIARIO, "conRatings.csv")
+
+async def bloquearRecursos(route):
+    """Cancela las peticiones de imágenes, fuentes, vídeo y anuncios; deja pasar el resto"""
+
+    request = route.request
+    if request.resource_type in TIPOS_BLOQUEADOS or any(dominio in request.url for dominio in DOMINIOS_BLOQUEADOS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def mainConcurrente(ruta_libros = RUTA_LIBROS, num_paginas = NUM_PAGINAS, modo = 'dom'):
+    """Igual que main, pero con un único navegador headless que procesa num_paginas libros a la vez.
+    Las páginas se reutilizan de un libro a otro y no se descargan imágenes, fuentes ni anuncios"""
+
+    df = pd.read_csv(ruta_libros)
+    pendientes = getLibrosPendientes(df)
+    inicio = time.perf_counter()
+    procesados = 0
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True, args=["--disable-extensions"])
+        context = await browser.new_context()
+        await context.route("**/*", bloquearRecursos)
+
+        # Páginas libres que se reparten entre los libros
+        paginas = asyncio.Queue()
+        for _ in range(num_paginas):
+            paginas.put_nowait(await context.new_page())
+
+        semaforo = asyncio.Semaphore(num_paginas)
+
+        async def procesarLibro(index, row):
+            nonlocal procesados
+
+            async with semaforo:
+                page = await paginas.get()
+                try:
+                    mean, num_ratings, reviews, completo = await MODOS[modo](page, row)
+                    guardarRatings(df, index, row, mean, num_ratings, reviews, completo)
+                except Exception as e:
+                    print(f"An error occurred for book: {str(e)}")
+
+                    # Si la página ha quedado en mal estado la sustituimos por una nueva
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                    page = await context.new_page()
+                finally:
+                    paginas.put_nowait(page)
+
+                procesados += 1
+                print(f"Libros procesados: {procesados}/{len(pendientes)} ({procesados / (time.perf_counter() - inicio):.2f} libros/s)")
+
+        await asyncio.gather(*(procesarLibro(index, row) for index, row in pendientes))
+
+        await context.close()
+        await browser.close()
+
+    diario.compactar(df, RUTA_DIARIO, "conRatings.csv")
+
+if __name__ == "__main__":
+    # python -m adquisicion.goodreadsReviews [--concurrente] [--api]
+    modo = 'api' if "--api" in sys.argv else 'dom'
+    if "--concurrente" in sys.argv:
+        asyncio.run(mainConcurrente(modo=modo))
+    else:
+        asyncio.run(main(modo=modo))
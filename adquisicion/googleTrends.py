@@ -2,79 +2,269 @@ import pandas as pd
 from datetime import datetime, timedelta
 from pytrends.request import TrendReq
 import time
-import pytrends
+from pytrends.exceptions import TooManyRequestsError
 import numpy as np
+from collections import deque
+
+import adquisicion.diario as diario
+import adquisicion.controlTasa as controlTasa
+import adquisicion.cacheKeywords as cacheKeywords
 
 CATEGORIA_TODAS = 0
 CATEGORIA_LIBROS = 22
 
-def getInterestOverTime(keywords, categoria, tf):
+# Keywords que admite Google Trends en una misma consulta
+MAX_KEYWORDS = 5
+
+# Keyword de referencia que se incluye en cada consulta por lotes para que los valores de
+# distintas consultas sean comparables entre sí
+ANCLA = "novel"
+
+# Días de la ventana de interés (BookInterest1M)
+DIAS_VENTANA = 30
+
+# Cliente de pytrends que comparten todas las consultas. Se crea en la primera consulta (getPytrends)
+# porque TrendReq pide las cookies de Google al construirse
+PYTRENDS = None
+
+def getPytrends():
+    """Devuelve el cliente TrendReq del módulo, creándolo si aún no existe"""
+
+    global PYTRENDS
+
+    if PYTRENDS is None:
+        PYTRENDS = TrendReq(hl='en-US', tz=360)
+    return PYTRENDS
+
+def getInterestOverTime(keywords, categoria, tf, relanzarLimite = False, relanzarErrores = False):
     """Devuelve datos relacionados con el interés a lo largo del tiempo
-    de la lista de keywords introducidas en una categoría y un timeframe dados"""
+    de la lista de keywords introducidas en una categoría y un timeframe dados.
+    Con relanzarLimite=True las respuestas 429 se lanzan como TooManyRequestsError y con
+    relanzarErrores=True se lanza también cualquier otro error (si no, se devuelve un df vacío,
+    igual que cuando Trends no tiene datos)"""
     try:
-        pytrends.build_payload(keywords, cat=categoria, timeframe=tf) 
-        data = pytrends.interest_over_time() 
+        pytrends = getPytrends()
+        pytrends.build_payload(keywords, cat=categoria, timeframe=tf)
+        data = pytrends.interest_over_time()
         data = data.reset_index()
         return data
+    except TooManyRequestsError as e:
+        if relanzarLimite:
+            raise
+        print(e)
     except Exception as e:
+        if relanzarErrores:
+            raise
         print(e)
 
     return pd.DataFrame()
 
 def getAdvancedKeyword(kw):
-    """Obtiene la keyword codificada dado un título"""
+    """Obtiene la keyword codificada dado un título. Los resultados (también los títulos sin
+    sugerencia de tipo libro) se guardan en cacheKeywords, así que cada título se consulta una sola vez"""
+
+    mid = cacheKeywords.leer(kw)
+
+    if mid is cacheKeywords.NO_CACHEADO:
+        suggestions = getPytrends().suggestions(keyword=kw)
+        book = next((item for item in suggestions if 'Book' in item['type']), None)
+        mid = book['mid'] if book != None else None
+        cacheKeywords.guardar(kw, mid)
 
-    suggestions = pytrends.suggestions(keyword=kw)
-    book = next((item for item in suggestions if 'Book' in item['type']), None)
-    if book != None:
-        return book['mid']
+    if mid != None:
+        return mid
     return kw
 
+def precargarKeywords(titulos, controlador = None):
+    """Resuelve y guarda en la caché las keywords de los títulos que aún no están en ella, al ritmo
+    que marque el controlador AIMD. Los 429 se reintentan; otros errores dejan el título sin cachear"""
+
+    pendientes = deque(cacheKeywords.getNoCacheados(titulos))
+    controlador = controlador or controlTasa.ControladorAIMD()
+
+    print(f"{len(pendientes)} títulos sin keyword en la caché")
+
+    while pendientes:
+        titulo = pendientes[0]
+        controlador.esperar()
 
-def getTrends(df, maxCount = 5000):
-    """Dado un dataframe de bestsellers, obtiene el interés para cada libro y autor si BookInterest1M es 0"""
+        try:
+            getAdvancedKeyword(titulo)
+            controlador.exito()
+        except TooManyRequestsError:
+            controlador.limitado()
+            continue
+        except Exception as e:
+            print(e)
+
+        pendientes.popleft()
+
+        if len(pendientes) % 10 == 0:
+            controlador.mostrar(len(pendientes))
+
+
+def getTrends(df, maxCount = 5000, ruta_diario = "trends.jsonl", controlador = None):
+    """Dado un dataframe de bestsellers, obtiene el interés para cada libro y autor si BookInterest1M es 0.
+    El ritmo de las peticiones lo marca un controlador AIMD: sube mientras hay éxitos y se reduce a la mitad
+    con cada 429 (el libro se reintenta más tarde). Termina cuando todos los libros están resueltos o tras
+    maxCount peticiones. Cada resultado se anota en el diario ruta_diario; al volver a llamarla se recuperan
+    los libros ya consultados. El csv final se obtiene con diario.compactar(df, ruta_diario, "trends.csv")"""
     
+    # Recuperamos los resultados anotados en ejecuciones anteriores
+    df = diario.aplicarDiario(df, ruta_diario)
+    df['BookInterest1M'] = df['BookInterest1M'].astype(float)
+
+    controlador = controlador or controlTasa.ControladorAIMD()
+    countTotal = 0
+
+    while countTotal < maxCount:
+
+        # Un libro queda resuelto cuando tiene interés o NaN (Trends no tiene datos); los 429 siguen a 0
+        pendientes = df.index[df['BookInterest1M'] == 0]
+        if len(pendientes) == 0:
+            break
+
+        for i in pendientes:
+
+            if countTotal == maxCount:
+                break
+
+            row = df.loc[i]
+            book = row['Title']
+            keywordsBook = [book]
+            date = row['Date']
+            minusMonth = date - timedelta(days=DIAS_VENTANA)
+            tfM = minusMonth.strftime("%Y-%m-%d") + " " + date.strftime("%Y-%m-%d")
+
+            controlador.esperar()
+            countTotal += 1
+
+            try:
+                data = getInterestOverTime(keywordsBook, CATEGORIA_LIBROS, tfM, relanzarLimite=True)
+            except TooManyRequestsError:
+                controlador.limitado()
+                continue
+
+            try:
+                suma = sum(data[book])
+                print("Suma = ", suma)
+                df.at[i, 'BookInterest1M'] = suma
+            except KeyError as e:
+                df.at[i, 'BookInterest1M'] = np.nan
+
+            controlador.exito()
+            diario.anotar(ruta_diario, {'Title': row['Title'], 'Author': row['Author'], 'BookInterest1M': df.at[i, 'BookInterest1M']})
+
+            if countTotal % 10 == 0:
+                controlador.mostrar(int((df['BookInterest1M'] == 0).sum()))
+
+    controlador.mostrar(int((df['BookInterest1M'] == 0).sum()))
+
+    return df
+
+def agruparPorVentana(pendientes, tam_lote, tolerancia_dias = 0):
+    """Agrupa las filas pendientes (ordenadas por fecha) en lotes de como mucho tam_lote títulos
+    distintos cuyas fechas se separan como mucho tolerancia_dias días"""
+
+    lotes = []
+    lote = []
+    titulos = set()
+
+    for i, row in pendientes.sort_values('Date').iterrows():
+        nuevo_titulo = row['Title'] not in titulos
+        cabe = (not nuevo_titulo or len(titulos) < tam_lote) and \
+            (not lote or (row['Date'] - lote[0][1]['Date']).days <= tolerancia_dias)
+
+        if lote and not cabe:
+            lotes.append(lote)
+            lote = []
+            titulos = set()
+
+        lote.append((i, row))
+        titulos.add(row['Title'])
+
+    if lote:
+        lotes.append(lote)
+
+    return lotes
+
+def getTrendsPorLotes(df, ancla = ANCLA, tolerancia_dias = 0, ruta_diario = "trends.jsonl", controlador = None, maxCount = 5000):
+    """Igual que getTrends, pero consultando hasta cinco keywords por petición: los libros con la misma
+    ventana de 30 días (o con fechas separadas como mucho tolerancia_dias días) se piden juntos y el
+    resultado se reparte en BookInterest1M sumando la ventana de cada libro.
+
+    Con ancla, cada lote incluye esa keyword y el interés de cada libro se expresa en relación al de
+    la ancla en su misma ventana (100 * suma libro / suma ancla), de modo que los valores de distintos
+    lotes son comparables. Sin ancla los valores solo son comparables dentro de cada lote. En ambos
+    casos la escala no es la de getTrends, que normaliza cada libro por separado.
+
+    Como en getTrends, el ritmo lo marca un controlador AIMD y los lotes con 429 se reintentan. Los lotes
+    con otros errores pasan al final de la cola; solo se anotan en el diario los lotes con respuesta"""
+
+    # Recuperamos los resultados anotados en ejecuciones anteriores
+    df = diario.aplicarDiario(df, ruta_diario)
+    df['BookInterest1M'] = df['BookInterest1M'].astype(float)
+
+    pendientes = df[df['BookInterest1M'] == 0]
+    tam_lote = MAX_KEYWORDS - 1 if ancla else MAX_KEYWORDS
+    lotes = deque(agruparPorVentana(pendientes, tam_lote, tolerancia_dias))
+
+    print(f"{len(pendientes)} libros en {len(lotes)} consultas")
+
+    controlador = controlador or controlTasa.ControladorAIMD()
+    countTotal = 0
+
+    while lotes and countTotal < maxCount:
+        lote = lotes[0]
+
+        fechas = [row['Date'] for _, row in lote]
+        inicio = min(fechas) - timedelta(days=DIAS_VENTANA)
+        tf = inicio.strftime("%Y-%m-%d") + " " + max(fechas).strftime("%Y-%m-%d")
+
+        keywords = list(dict.fromkeys(row['Title'] for _, row in lote))
+        if ancla:
+            keywords.append(ancla)
+
+        controlador.esperar()
+        countTotal += 1
+
+        try:
+            data = getInterestOverTime(keywords, CATEGORIA_LIBROS, tf, relanzarLimite=True, relanzarErrores=True)
+        except TooManyRequestsError:
+            # El mismo lote se reintenta cuando lo permita el controlador
+            controlador.limitado()
+            continue
+        except Exception as e:
+            # Sin respuesta el lote queda pendiente (no se anota) y se reintenta después de los demás
+            print(e)
+            lotes.rotate(-1)
+            continue
+
+        lotes.popleft()
+        controlador.exito()
+
+        for i, row in lote:
+            book = row['Title']
+            try:
+                # Nos quedamos con la ventana de 30 días de este libro
+                ventana = data[(data['date'] >= row['Date'] - timedelta(days=DIAS_VENTANA)) & (data['date'] <= row['Date'])]
+                suma = ventana[book].sum()
+
+                if ancla:
+                    suma_ancla = ventana[ancla].sum()
+                    suma = 100 * suma / suma_ancla if suma_ancla > 0 else np.nan
+
+                print("Suma = ", suma)
+                df.at[i, 'BookInterest1M'] = suma
+            except KeyError as e:
+                # Trends ha respondido sin datos para el libro
+                df.at[i, 'BookInterest1M'] = np.nan
+
+            diario.anotar(ruta_diario, {'Title': row['Title'], 'Author': row['Author'], 'BookInterest1M': df.at[i, 'BookInterest1M']})
+
+        if countTotal % 10 == 0:
+            controlador.mostrar(sum(len(lote) for lote in lotes))
 
-    while True:
-        countTotal = 0
-        countBuenos = 0
-        countMalos = 0
-        for i, row in df.iterrows():
-
-            if row['BookInterest1M'] == 0:
-                book = row['Title']
-                keywordsBook = [book]
-                date = row['Date']
-                minusMonth = date - timedelta(days=30)
-                tfM = minusMonth.strftime("%Y-%m-%d") + " " + date.strftime("%Y-%m-%d")
-
-                data = getInterestOverTime(keywordsBook, CATEGORIA_LIBROS, tfM)
-                try:
-                    suma = sum(data[book])
-                    print("Suma = ", suma)
-                    df.at[i, 'BookInterest1M'] = suma
-                    countBuenos += 1
-                    countMalos = 0
-        
-                except KeyError as e:
-                    df.at[i, 'BookInterest1M'] = np.nan
-                    countMalos += 1
-
-                if countMalos == 10:
-                    countMalos = 0
-                    df.to_csv("trends.csv")
-                    time.sleep(90)
-
-                time.sleep(1)
-                if countBuenos == 10:
-                    countBuenos = 0
-                    df.to_csv("trends.csv")
-                    time.sleep(65)
-                    
-                if countTotal == 300:
-                    countTotal = 0
-                    time.sleep(240)
-
-                if countTotal == maxCount:
-                    return df
+    controlador.mostrar(sum(len(lote) for lote in lotes))
 
+    return df
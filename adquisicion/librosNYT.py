@@ -1,8 +1,10 @@
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 
+import adquisicion.clienteHTTP as clienteHTTP
+import adquisicion.concurrencia as concurrencia
+import adquisicion.parseo as parseo
+
 # --- CONSTANTES ---
 
 # URL base de la lista NYT
@@ -16,6 +18,12 @@ DAY_INI = 4
 # Semanas a retroceder por defecto
 WEEKS_BACK = 52 * 5
 
+# Conexiones simultáneas máximas a nytimes.com en el modo concurrente
+MAX_WORKERS = 4
+
+# Solo se parsean los elementos de la lista de libros
+FILTRO_LISTA = parseo.crearFiltro('li', class_='css-13y32ub')
+
 """
     La lista NYT tiene distintas categorías para los libros bestsellers.
     Aquí se encuentran sus urls base clasificados en un diccionario.
@@ -55,51 +63,81 @@ def minusWeek(day, month, year):
     new_date = date - timedelta(weeks=1)
     return new_date.day, new_date.month, new_date.year
 
-def getBooksNYT(day = DAY_INI, month = MONTH_INI, year = YEAR_INI, wb = WEEKS_BACK):
-    """Accede a la lista NYT a partir de la fecha dada hasta wb semanas atrás y devuelve 
-    un dataframe con información acerca de estos libros"""
+def parsearListaNYT(html, date, main_category, subcategory):
+    """Devuelve la lista de libros (diccionarios) de una página de la lista NYT"""
+
+    soup = parseo.crearSoup(html, FILTRO_LISTA)
+
+    books = []
+
+    # Recopilamos la información de los libros
+    for item in soup.find_all('li', class_='css-13y32ub'):
+
+        title = item.find('h3').text.strip()
+        author = item.find('p', class_='css-hjukut').text.strip()[3:] 
+        publisher = item.find('p', class_='css-heg334').text.strip()
+        description = item.find('p', itemprop='description').text.strip()
+        weeks_on_list = item.find('p', class_='css-1o26r9v').text.strip().split()[0].replace("New", "1")
+
+        books.append({'Title': title, 'Author': author, 'Publisher': publisher, 'Description': description, 'Weeks on List': weeks_on_list, 'Date': date, 'Main Category': main_category, 'Subcategory': subcategory})
 
-    # dataframe en el que se almacenarán los bestellers
-    DF_BESTSELLERS = pd.DataFrame()
+    return books
 
-    # Retrocedemos tantas semanas como indiquemos (por defecto 52)
+def generarPaginasNYT(day, month, year, wb):
+    """Devuelve la lista ordenada de páginas (url, fecha, categoría, subcategoría) a consultar"""
+
+    paginas = []
+
+    # Retrocedemos tantas semanas como indiquemos
     for i in range(wb):
 
         fechaURL = str(year) + "/" + str(month).zfill(2) + "/" + str(day).zfill(2)
+        date = datetime(year, month, day)
 
         # Recorremos las categorías y subcategorías de bestsellers
         for main_category, subcategories in CATEGORIES_WITH_URLS.items():
             for subcategory, subcategory_url in subcategories.items():
-                
-                # Generamos la url y hacemos la request
-                url = URL_BASE + fechaURL + subcategory_url
-                response = requests.get(url)
+                paginas.append((URL_BASE + fechaURL + subcategory_url, date, main_category, subcategory))
 
-                # Si la request tiene éxito
-                if response.status_code == 200:
+        # Restamos una semana
+        day, month, year = minusWeek(day, month, year)
 
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    list_items = soup.find_all('li', class_='css-13y32ub')
+    return paginas
 
-                    books = []
+def descargarPaginaNYT(pagina):
+    """Descarga y parsea una página de la lista NYT. Devuelve una lista vacía si la request falla"""
 
-                    # Recopilamos la información de los libros
-                    for item in soup.find_all('li', class_='css-13y32ub'):
+    url, date, main_category, subcategory = pagina
+    response = clienteHTTP.get(url)
 
-                        title = item.find('h3').text.strip()
-                        author = item.find('p', class_='css-hjukut').text.strip()[3:] 
-                        publisher = item.find('p', class_='css-heg334').text.strip()
-                        description = item.find('p', itemprop='description').text.strip()
-                        weeks_on_list = item.find('p', class_='css-1o26r9v').text.strip().split()[0].replace("New", "1")
-                        date = datetime(year, month, day)
+    # Si la request tiene éxito
+    if response.status_code == 200:
+        return parsearListaNYT(response.text, date, main_category, subcategory)
+    return []
 
-                        books.append({'Title': title, 'Author': author, 'Publisher': publisher, 'Description': description, 'Weeks on List': weeks_on_list, 'Date': date, 'Main Category': main_category, 'Subcategory': subcategory})
-                    
-                    # Actualizamos el dataframe
-                    DF_BESTSELLERS = pd.concat([DF_BESTSELLERS, pd.DataFrame(books)])
+def crearDfBestsellers(libros_por_pagina):
+    """Construye de una sola vez el dataframe de bestsellers a partir de los libros de cada página.
+    Cada página conserva su propio índice (0..n-1), igual que al concatenar página a página"""
 
-        # Restamos una semana
-        day, month, year = minusWeek(day, month, year)
+    libros = [libro for libros_pagina in libros_por_pagina for libro in libros_pagina]
+    if not libros:
+        return pd.DataFrame()
+
+    indice = [i for libros_pagina in libros_por_pagina for i in range(len(libros_pagina))]
+    return pd.DataFrame(libros, index=indice)
+
+def getBooksNYT(day = DAY_INI, month = MONTH_INI, year = YEAR_INI, wb = WEEKS_BACK, concurrente = False, max_workers = MAX_WORKERS):
+    """Accede a la lista NYT a partir de la fecha dada hasta wb semanas atrás y devuelve 
+    un dataframe con información acerca de estos libros. Con concurrente=True las páginas se 
+    descargan en paralelo con como máximo max_workers conexiones simultáneas a nytimes.com
+    (el ritmo de peticiones lo marca el límite de nytimes.com en clienteHTTP)"""
+
+    paginas = generarPaginasNYT(day, month, year, wb)
+
+    if concurrente:
+        # Los resultados conservan el orden de las páginas, por lo que el resultado es el mismo que en serie
+        libros_por_pagina = concurrencia.procesarEnParalelo(descargarPaginaNYT, paginas, max_workers=max_workers, descripcion="Páginas NYT")
+    else:
+        libros_por_pagina = [descargarPaginaNYT(pagina) for pagina in paginas]
 
-    return DF_BESTSELLERS
-    
+    return crearDfBestsellers(libros_por_pagina)
@@ -1,13 +1,18 @@
 # Importamos las librerías
 
+import json
 import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 
+import adquisicion.clienteHTTP as clienteHTTP
+import adquisicion.concurrencia as concurrencia
+import adquisicion.goodreads as goodreads
+import adquisicion.parseo as parseo
+import adquisicion.poolNavegadores as poolNavegadores
+
 # Url base de GoodReads
 URL_BASE = "https://www.goodreads.com/book/popular_by_date/"
 
@@ -18,6 +23,19 @@ YEAR_INI = 2024
 # Meses en los que retrocedemos
 MESES_ATRAS = 12 * 5
 
+# Páginas de la API que se piden por mes, sin contar la primera (equivale a pulsar 'Show more books' 13 veces)
+MAX_PAGINAS = 13
+
+# Claves de runtimeConfig (__NEXT_DATA__) con la url y la clave del endpoint GraphQL de GoodReads
+CLAVES_ENDPOINT = ("graphqlEndpoint", "appSyncUrl", "graphQLEndpoint")
+CLAVES_API_KEY = ("graphqlApiKey", "appSyncApiKey", "graphQLApiKey")
+
+# Tipos GraphQL de los argumentos de la consulta según su tipo en Python
+TIPOS_GRAPHQL = {int: "Int", str: "String", bool: "Boolean", float: "Float"}
+
+# Solo se parsean los contenedores de libros de la página del mes
+FILTRO_LIBROS = parseo.crearFiltro("div", class_="BookListItem__body")
+
 def restarMes(month, year):
     """Resta un mes a la fecha dada (sin días)"""
     
@@ -29,20 +47,12 @@ def restarMes(month, year):
     return (month, year)
 
 
-def getPopularBooks(ma = MESES_ATRAS, month = MES_INI, year = YEAR_INI):
-    """Devuelve un dataframe con título, autor y  descripción de libros populares sacados en el mes y año
-    introducidos, hasta un total de ma meses atrás"""
+def getPopularesMes(month, year, num_expansiones):
+    """Devuelve la lista de libros (diccionarios con título, autor, descripción y url) populares
+    del mes y año introducidos, pulsando num_expansiones veces 'Show more books' en el navegador"""
 
-    DF_POPULARES = []
-
-    # Veces que se pulsa el botón Show More
-    NUM_EXPANSIONES = 13
-    
-    # Recorremos ma meses atrás
-    for i in range(ma):
-
-        # Configuramos el navegador
-        driver = webdriver.Chrome()
+    # Tomamos prestado un navegador del pool (se devuelve al salir del bloque)
+    with poolNavegadores.navegador() as driver:
 
         # Abrimos la página web
         fecha = str(year) + "/" + str(month)
@@ -51,8 +61,8 @@ def getPopularBooks(ma = MESES_ATRAS, month = MES_INI, year = YEAR_INI):
 
         puedeAparecerSpam = True
 
-        # Pulsamos el botón 'Show more books' NUM_EXPANSIONES veces
-        for j in range(NUM_EXPANSIONES):
+        # Pulsamos el botón 'Show more books' num_expansiones veces
+        for j in range(num_expansiones):
 
             # Esperamos hasta que el botón sea visible en la página
             boton = WebDriverWait(driver, 5).until(
@@ -87,53 +97,168 @@ def getPopularBooks(ma = MESES_ATRAS, month = MES_INI, year = YEAR_INI):
         # Obtetemos el HTML de la página actualizada
         html = driver.page_source
 
-        soup = BeautifulSoup(html, 'html.parser')
+    soup = parseo.crearSoup(html, FILTRO_LIBROS)
 
-        # Contenedores de libros
-        book_containers = soup.find_all("div", class_="BookListItem__body")
+    # Contenedores de libros
+    book_containers = soup.find_all("div", class_="BookListItem__body")
 
-        titles = []
-        authors = []
-        descriptions = []
-        urls = []
+    libros = []
 
-        # Recorremos los contenedores
-        for container in book_containers:
+    # Recorremos los contenedores
+    for container in book_containers:
 
-            title_element = container.find("a", {'data-testid': 'bookTitle'})
+        title_element = container.find("a", {'data-testid': 'bookTitle'})
 
-            # Si encuentra el título
-            if title_element:
+        # Si encuentra el título extraemos el título, autor, descripción y url
+        if title_element:
+            libros.append({
+                "Title": limpiarTitulo(title_element.text),
+                "Author": container.find("span", class_="ContributorLink__name").text.strip(),
+                "Description": container.find("div", {"class": "TruncatedContent__text"}).text.strip(),
+                "URL": title_element['href']
+            })
 
-                # Extraemos el título, autor y descripción
-                title = title_element.text.strip().replace('[', '').replace(']', '').split('(')[0]
-                titles.append(title)
-                
-                url = title_element['href']
-                urls.append(url)
+    return libros
 
-                author = container.find("span", class_="ContributorLink__name").text.strip()
-                authors.append(author)
+def limpiarTitulo(titulo):
+    """Quita los corchetes y lo que va entre paréntesis (la saga) del título"""
 
-                description = container.find("div", {"class": "TruncatedContent__text"}).text.strip()
-                descriptions.append(description)
+    return titulo.strip().replace('[', '').replace(']', '').split('(')[0]
 
-                data = {
-                    "Title": titles,
-                    "Author": authors,
-                    "Description": descriptions,
-                    "URL": urls 
-                }
+def getConfigGraphQL(next_data):
+    """Devuelve la url y la clave del endpoint GraphQL a partir del runtimeConfig de __NEXT_DATA__"""
 
-                DF_POPULARES.append(pd.DataFrame(data))
+    config = next_data.get('runtimeConfig') or {}
 
-        # Actualizamos la fecha
-        month, year = restarMes(month, year)
+    endpoint = next((config[clave] for clave in CLAVES_ENDPOINT if config.get(clave)), None)
+    api_key = next((config[clave] for clave in CLAVES_API_KEY if config.get(clave)), None)
+
+    if endpoint is None or api_key is None:
+        raise ValueError("No se encuentra el endpoint GraphQL en runtimeConfig")
+
+    return endpoint, api_key
+
+def getConsultaRaiz(apollo):
+    """Devuelve el campo de la consulta de libros populares de ROOT_QUERY, sus argumentos y su resultado.
+    Apollo guarda cada consulta como 'campo({"arg": valor, ...})'"""
+
+    for clave, valor in apollo.get('ROOT_QUERY', {}).items():
+        if clave.startswith('getPopular') and isinstance(valor, dict) and 'edges' in valor:
+            campo, _, argumentos = clave.partition('(')
+            argumentos = json.loads(argumentos[:-1]) if argumentos else {}
+            return campo, argumentos, valor
+
+    raise ValueError("No se encuentra la consulta de libros populares en el estado de Apollo")
+
+def construirConsulta(campo, argumentos):
+    """Construye la consulta GraphQL de una página de libros populares (inferida de la que hace la web)"""
+
+    declaraciones = ["$pagination: PaginationInput"]
+    usos = ["pagination: $pagination"]
+
+    for nombre, valor in argumentos.items():
+        if nombre != 'pagination':
+            declaraciones.append(f"${nombre}: {TIPOS_GRAPHQL.get(type(valor), 'String')}")
+            usos.append(f"{nombre}: ${nombre}")
+
+    return f"""query {campo}({", ".join(declaraciones)}) {{
+  {campo}({", ".join(usos)}) {{
+    edges {{ node {{ title webUrl description primaryContributorEdge {{ node {{ name }} }} }} }}
+    pageInfo {{ nextPageToken }}
+  }}
+}}"""
+
+def extraerLibroPopular(libro, apollo = None):
+    """Devuelve el registro (Title, Author, Description, URL) de un Book de Apollo o de la respuesta GraphQL"""
+
+    resolver = (lambda objeto: goodreads.resolverRef(apollo, objeto)) if apollo else (lambda objeto: objeto)
 
-    # Concatenamos las listas
-    DF_POPULARES = pd.concat(DF_POPULARES, ignore_index=True).drop_duplicates().reset_index(drop = True)
+    libro = resolver(libro)
+    autor = resolver(((libro.get('primaryContributorEdge') or {}).get('node'))) or {}
+    descripcion = libro.get('description') or libro.get('description({"stripped":true})') or ''
+
+    return {
+        "Title": limpiarTitulo(libro['title']),
+        "Author": (autor.get('name') or '').strip(),
+        "Description": parseo.crearSoup(descripcion).get_text().strip(),
+        "URL": libro['webUrl']
+    }
+
+def getPopularesMesAPI(month, year, max_paginas = MAX_PAGINAS):
+    """Igual que getPopularesMes, pero sin navegador: lee la primera página de libros del JSON embebido
+    en la página del mes y pide las siguientes directamente al endpoint GraphQL con el que la web
+    carga 'Show more books'. Cada libro se añade una sola vez"""
+
+    respuesta = clienteHTTP.get(URL_BASE + str(year) + "/" + str(month))
+    respuesta.raise_for_status()
+
+    next_data = goodreads.getNextData(respuesta.text)
+    apollo = next_data['props']['pageProps']['apolloState']
+
+    endpoint, api_key = getConfigGraphQL(next_data)
+    campo, argumentos, resultado = getConsultaRaiz(apollo)
+    consulta = construirConsulta(campo, argumentos)
+
+    # url -> registro, para no repetir libros
+    libros = {}
+    for edge in resultado.get('edges') or []:
+        libro = extraerLibroPopular(edge['node'], apollo)
+        libros.setdefault(libro['URL'], libro)
+
+    siguiente = (resultado.get('pageInfo') or {}).get('nextPageToken')
+
+    for pagina in range(max_paginas):
+        if not siguiente:
+            break
+
+        variables = {nombre: valor for nombre, valor in argumentos.items() if nombre != 'pagination'}
+        variables['pagination'] = {**(argumentos.get('pagination') or {}), 'after': siguiente}
+
+        respuesta = clienteHTTP.post(endpoint, json={'operationName': campo, 'query': consulta, 'variables': variables},
+                                     headers={'x-api-key': api_key})
+        respuesta.raise_for_status()
+
+        datos = respuesta.json()['data'][campo]
+        for edge in datos.get('edges') or []:
+            libro = extraerLibroPopular(edge['node'])
+            libros.setdefault(libro['URL'], libro)
+
+        siguiente = (datos.get('pageInfo') or {}).get('nextPageToken')
+
+    return list(libros.values())
+
+def getLibrosMes(month, year, usarNavegador = False):
+    """Devuelve los libros populares de un mes con la API y, si falla (o con usarNavegador=True), con Selenium"""
+
+    if not usarNavegador:
+        try:
+            return getPopularesMesAPI(month, year)
+        except Exception as e:
+            print(f"No se ha podido usar la API para {year}/{month}, se usa el navegador: {e}")
+
+    return getPopularesMes(month, year, MAX_PAGINAS)
+
+def getPopularBooks(ma = MESES_ATRAS, month = MES_INI, year = YEAR_INI, max_workers = concurrencia.MAX_WORKERS, usarNavegador = False):
+    """Devuelve un dataframe con título, autor y  descripción de libros populares sacados en el mes y año
+    introducidos, hasta un total de ma meses atrás. Los meses se procesan en paralelo con max_workers
+    hilos (con usarNavegador=True la concurrencia real la limita el tamaño de poolNavegadores)"""
+
+    # Meses que recorremos hacia atrás
+    meses = []
+    for i in range(ma):
+        meses.append((month, year))
+        month, year = restarMes(month, year)
 
-    # Cerramos el navegador
-    driver.quit()
+    por_mes = concurrencia.procesarEnParalelo(
+        lambda mes: getLibrosMes(mes[0], mes[1], usarNavegador),
+        meses,
+        max_workers=max_workers,
+        descripcion="Meses de GoodReads",
+        mostrar_cada=1
+    )
+
+    # Construimos el dataframe una sola vez con los libros de todos los meses
+    DF_POPULARES = pd.DataFrame([libro for libros in por_mes for libro in libros], columns=["Title", "Author", "Description", "URL"])
+    DF_POPULARES = DF_POPULARES.drop_duplicates().reset_index(drop = True)
     
-    return DF_POPULARES
\ No newline at end of file
+    return DF_POPULARES
@@ -7,6 +7,8 @@ import adquisicion.googleTrends as googleTrends
 import adquisicion.autoresGoodreads as autoresGoodreads
 import adquisicion.autoresWikipedia as autoresWiki
 
+import adquisicion.fragmentos as fragmentos
+
 import limpieza
 
 def main():
@@ -18,7 +20,7 @@ def main():
     # --- LIBROS ---
 
     # Obtenemos la información de GoodReads (nosotros lo hicimos con la función
-    # 'getInfoGoodReadsPorPartes' que realiza el procesamiento en dos partes)
+    # 'getInfoGoodReadsPorPartes' que realiza el procesamiento por fragmentos reanudables)
     dfLibros = getInfoGoodReads(dfLibros)
 
     # Obtenemos los precios de Barnes&Noble
@@ -28,41 +30,43 @@ def main():
     dfLibros = limpieza.gestionarFechasParaTrends(dfLibros)
     dfLibros = googleTrends.getTrends(dfLibros)
 
-    # Almacenamos el dataframe en formato parquet
-    dfLibros.to_parquet('libros_limpios.parquet')
+    # Almacenamos el dataframe en formato parquet (sin los autores de GoodReads de cada libro, que
+    # solo se usan para generar autores_url.csv)
+    dfLibros.drop(['Contributors'], axis=1, errors='ignore').to_parquet('libros_limpios.parquet')
 
     # --- AUTORES ---
 
     # Obtenemos información de los autores a partir de la lista de libros y la almacenamos
     dfAutoresWiki = autoresWiki.generarDfAutores(dfLibros)
     dfAutoresWiki.to_csv('autores_wikipedia.csv')
-    dfAutoresGoodreads = autoresGoodreads.generarDfAutoresGoodReads('./data')
+    dfAutoresGoodreads = autoresGoodreads.generarDfAutoresGoodReads('./fragmentos_autores_goodreads')
     dfAutoresGoodreads.to_csv('autores_goodreads.csv')
 
-def getInfoGoodReads(dfLibros):
+def getInfoGoodReads(dfLibros, max_workers = 8):
     """A partir del dataframe con libros obtiene, para cada libro, la información
-    disponible en su página de GoodReads"""
-    df_info = dfLibros['Title'].apply(goodreads.getInfoLibro).apply(pd.Series)
+    disponible en su página de GoodReads (en paralelo con max_workers hilos)"""
+    df_info = goodreads.getInfoLibros(dfLibros['Title'], max_workers=max_workers)
     return pd.concat([dfLibros, df_info], axis=1)
 
-def getInfoGoodReadsPorPartes():
-    """Obtiene la información de goodreads de los libros (libros1.csv y libros2.csv) divididos 
-    en 2 partes para facilitar el procesamiento"""
+def infoGoodReadsFragmento(dfFragmento):
+    """Añade a un fragmento del dataframe de libros la información de GoodReads"""
+    df_info = goodreads.getInfoLibros(dfFragmento['Title'])
+    return pd.concat([dfFragmento, df_info], axis=1)
+
+def getInfoGoodReadsPorPartes(dfLibros, ruta_carpeta = './fragmentos_goodreads', n_fragmentos = 10, procesos = 1):
+    """Obtiene la información de goodreads de los libros dividiéndolos en n_fragmentos para facilitar
+    el procesamiento. Si se interrumpe, al volver a llamarla solo se procesan los fragmentos pendientes"""
 
-    for i in range(2):
-        print(f"COMENZANDO PROCESAMIENTO PARTE {i + 1}")
-        
-        LIBROS = pd.read_csv(f"libros{i + 1}.csv")
-        df_info = LIBROS['Title'].apply(goodreads.getInfoLibro).apply(pd.Series)
+    fragmentos.ejecutarFragmentos(dfLibros, infoGoodReadsFragmento, ruta_carpeta, n_fragmentos, procesos)
 
-        LIBROS = pd.concat([LIBROS, df_info], axis=1)
+    LIBROS = fragmentos.unirFragmentos(ruta_carpeta)
+    LIBROS.to_csv("libros_procesados.csv")
 
-        LIBROS.to_csv(f"libros_procesados_{i + 1}.csv")
-        
-        print(f"FINALIZANDO PROCESAMIENTO PARTE {i + 1}")
+    return LIBROS
 
-def getPricesBN(dfLibros):
-    df_precios = pd.DataFrame(dfLibros['Title'].apply(barnesAndNoble.getPrice).tolist())
+def getPricesBN(dfLibros, max_workers = barnesAndNoble.MAX_WORKERS):
+    """Añade a cada libro su precio y formato en Barnes&Noble (en paralelo con max_workers hilos)"""
+    df_precios = barnesAndNoble.getPrices(dfLibros['Title'], max_workers=max_workers)
     dfLibros= pd.concat([dfLibros, df_precios], axis=1)
     return dfLibros
 
@@ -0,0 +1,49 @@
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml construye el árbol de BeautifulSoup varias veces más rápido que html.parser, pero si no
+# está instalado usamos el parser de la librería estándar
+try:
+    import lxml
+    PARSER_POR_DEFECTO = "lxml"
+except ImportError:
+    PARSER_POR_DEFECTO = "html.parser"
+
+# Módulo con el backend de parseo HTML que comparten los scrapers. Cada scraper pasa a crearSoup
+# un filtro (SoupStrainer) con la parte de la página que necesita (la lista del NYT, el contenido
+# del artículo de Wikipedia, la lista de autores de GoodReads...) y solo se construye ese subárbol
+
+# --- CONSTANTES ---
+
+# Parser de BeautifulSoup (se puede cambiar con la variable de entorno NOVELLA_PARSER)
+PARSER = os.environ.get("NOVELLA_PARSER", PARSER_POR_DEFECTO)
+
+# Si es False se ignoran los filtros y se construye siempre la página completa
+FILTRAR = os.environ.get("NOVELLA_FILTRAR", "1") == "1"
+
+# --- FUNCIONES ---
+
+def configurar(parser = None, filtrar = None):
+    """Cambia el parser de BeautifulSoup y la activación de los filtros"""
+
+    global PARSER, FILTRAR
+
+    if parser is not None:
+        PARSER = parser
+    if filtrar is not None:
+        FILTRAR = filtrar
+
+def crearFiltro(*args, **kwargs):
+    """Crea un filtro de etiquetas con la misma sintaxis que find ('li', class_='...')"""
+
+    return SoupStrainer(*args, **kwargs)
+
+def crearSoup(html, filtro = None):
+    """Devuelve el árbol de BeautifulSoup del html con el parser configurado. Con filtro solo
+    se construyen las etiquetas que lo cumplen (y todo lo que contienen)"""
+
+    if filtro is not None and FILTRAR:
+        return BeautifulSoup(html, PARSER, parse_only=filtro)
+
+    return BeautifulSoup(html, PARSER)
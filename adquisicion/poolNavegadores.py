@@ -0,0 +1,177 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+
+# Módulo con un pool de navegadores Chrome headless para el código que usa Selenium. En lugar de
+# abrir un Chrome por libro (varios segundos de arranque, y procesos que se quedan abiertos si
+# nadie llama a quit) los drivers se crean una vez, se prestan y se devuelven al pool. Cada driver
+# se sustituye tras USOS_MAXIMOS préstamos o tras un error, y al terminar el programa se cierran todos
+
+# --- CONSTANTES ---
+
+# Número de navegadores del pool, es decir, cuántas páginas se pueden procesar a la vez
+TAM_POOL = 2
+
+# Préstamos tras los que un driver se cierra y se sustituye por uno nuevo (Chrome va acumulando memoria)
+USOS_MAXIMOS = 50
+
+# Segundos máximos de carga de una página
+TIMEOUT_CARGA = 60
+
+# --- ESTADO COMPARTIDO ---
+
+_pool = None
+_lock = threading.Lock()
+
+# --- FUNCIONES ---
+
+def crearDriver():
+    """Abre un Chrome headless sin carga de imágenes y lo deja preparado en una página en blanco"""
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--window-size=1920,1080")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(TIMEOUT_CARGA)
+    driver.get("about:blank")
+
+    return driver
+
+def cerrarDriver(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Error al cerrar el navegador: {e}")
+
+class PoolNavegadores:
+    """Pool de como mucho 'tam' drivers. Los drivers se crean la primera vez que hacen falta;
+    si todos están prestados, navegador() espera a que se devuelva alguno"""
+
+    def __init__(self, tam = TAM_POOL, usos_maximos = USOS_MAXIMOS):
+        self.tam = tam
+        self.usos_maximos = usos_maximos
+
+        self.libres = queue.LifoQueue()
+        self.huecos = threading.Semaphore(tam)
+        # driver -> número de préstamos, de todos los drivers abiertos (libres o prestados)
+        self.usos = {}
+        self.lock = threading.Lock()
+        self.cerrado = False
+
+    def obtener(self):
+        self.huecos.acquire()
+
+        if self.cerrado:
+            self.huecos.release()
+            raise RuntimeError("El pool de navegadores está cerrado")
+
+        try:
+            return self.libres.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            driver = crearDriver()
+        except Exception:
+            self.huecos.release()
+            raise
+
+        with self.lock:
+            self.usos[driver] = 0
+
+        return driver
+
+    def devolver(self, driver, descartar = False):
+        with self.lock:
+            # Si el pool se cerró mientras estaba prestado, el driver ya está cerrado
+            if driver not in self.usos:
+                self.huecos.release()
+                return
+
+            self.usos[driver] += 1
+            descartar = descartar or self.cerrado or self.usos[driver] >= self.usos_maximos
+            if descartar:
+                del self.usos[driver]
+
+        if descartar:
+            cerrarDriver(driver)
+        else:
+            self.libres.put(driver)
+
+        self.huecos.release()
+
+    @contextmanager
+    def navegador(self):
+        """Presta un driver durante el bloque with. Si el bloque lanza una excepción el driver se
+        descarta, porque puede haber quedado en un estado desconocido"""
+
+        driver = self.obtener()
+        try:
+            yield driver
+        except BaseException:
+            self.devolver(driver, descartar=True)
+            raise
+        else:
+            self.devolver(driver)
+
+    def cerrar(self):
+        """Cierra todos los drivers abiertos, también los que estén prestados"""
+
+        with self.lock:
+            self.cerrado = True
+            drivers = list(self.usos)
+            self.usos.clear()
+
+        for driver in drivers:
+            cerrarDriver(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def configurar(tam = None, usos_maximos = None):
+    """Cambia el tamaño y los usos máximos del pool compartido (se cierra el actual si lo hay)"""
+
+    global TAM_POOL, USOS_MAXIMOS
+
+    if tam is not None:
+        TAM_POOL = tam
+    if usos_maximos is not None:
+        USOS_MAXIMOS = usos_maximos
+
+    cerrarPool()
+
+def getPool():
+    """Devuelve el pool compartido, creándolo la primera vez"""
+
+    global _pool
+
+    with _lock:
+        if _pool is None or _pool.cerrado:
+            _pool = PoolNavegadores(TAM_POOL, USOS_MAXIMOS)
+        return _pool
+
+def navegador():
+    """Presta un driver del pool compartido: with poolNavegadores.navegador() as driver: ..."""
+
+    return getPool().navegador()
+
+def cerrarPool():
+    global _pool
+
+    with _lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.cerrar()
+
+atexit.register(cerrarPool)
@@ -0,0 +1,231 @@
+import sqlite3
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from pytrends.exceptions import TooManyRequestsError
+
+import adquisicion.googleTrends as googleTrends
+import adquisicion.controlTasa as controlTasa
+import adquisicion.cacheKeywords as cacheKeywords
+
+# Módulo con un almacén local de series diarias de Google Trends por keyword (MID de
+# getAdvancedKeyword) y categoría. Cada serie se descarga una vez en tramos solapados (Trends solo
+# da datos diarios para periodos de unos nueve meses), los tramos se empalman reescalándolos con
+# el solape y cualquier ventana (BookInterest1M, 7 días, 90 días...) se calcula recortando la serie
+
+# --- CONSTANTES ---
+
+RUTA_SERIES = "series_trends.sqlite"
+
+# Días de cada tramo descargado y días de solape entre tramos consecutivos
+DIAS_TRAMO = 240
+DIAS_SOLAPE = 30
+
+# --- FUNCIONES ---
+
+def getConexion(ruta = RUTA_SERIES):
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS interes (
+            keyword TEXT,
+            categoria INTEGER,
+            fecha TEXT,
+            valor REAL,
+            PRIMARY KEY (keyword, categoria, fecha)
+        )""")
+    return conexion
+
+def leerSerie(keyword, categoria, ruta = RUTA_SERIES):
+    """Devuelve la serie diaria guardada de una keyword (Series indexada por fecha, vacía si no hay)"""
+
+    with getConexion(ruta) as conexion:
+        filas = conexion.execute(
+            "SELECT fecha, valor FROM interes WHERE keyword = ? AND categoria = ? ORDER BY fecha", (keyword, categoria)
+        ).fetchall()
+
+    if not filas:
+        return pd.Series(dtype=float)
+
+    fechas, valores = zip(*filas)
+    return pd.Series(valores, index=pd.to_datetime(fechas), dtype=float)
+
+def guardarSerie(keyword, categoria, serie, ruta = RUTA_SERIES):
+    with getConexion(ruta) as conexion:
+        conexion.executemany(
+            "INSERT OR REPLACE INTO interes VALUES (?, ?, ?, ?)",
+            [(keyword, categoria, fecha.strftime("%Y-%m-%d"), float(valor)) for fecha, valor in serie.items()]
+        )
+
+def descargarTramo(keyword, categoria, inicio, fin, controlador):
+    """Descarga el interés diario de una keyword entre dos fechas al ritmo del controlador AIMD.
+    Los 429 se reintentan (el controlador reduce la tasa); devuelve None si Trends no tiene datos o falla"""
+
+    tf = inicio.strftime("%Y-%m-%d") + " " + fin.strftime("%Y-%m-%d")
+
+    while True:
+        controlador.esperar()
+        try:
+            data = googleTrends.getInterestOverTime([keyword], categoria, tf, relanzarLimite=True)
+        except TooManyRequestsError:
+            controlador.limitado()
+            continue
+        controlador.exito()
+        break
+
+    if keyword not in data:
+        return None
+
+    return pd.Series(data[keyword].to_numpy(dtype=float), index=pd.to_datetime(data['date']))
+
+def empalmar(serie, tramo):
+    """Reescala el tramo para que coincida con la serie en los días que comparten y los une.
+    Devuelve None si no comparten días (o solo uno de los dos tiene interés en ellos) y no se puede reescalar"""
+
+    comunes = serie.index.intersection(tramo.index)
+    if comunes.empty:
+        return None
+
+    suma_serie = serie[comunes].sum()
+    suma_tramo = tramo[comunes].sum()
+
+    if suma_serie > 0 and suma_tramo > 0:
+        factor = suma_serie / suma_tramo
+    elif suma_serie == 0 and suma_tramo == 0:
+        # Sin interés en el solape las dos escalas coinciden en el cero
+        factor = 1.0
+    else:
+        return None
+
+    nuevos = tramo[~tramo.index.isin(serie.index)] * factor
+    return pd.concat([serie, nuevos]).sort_index()
+
+def diasSinCubrir(inicio, fin, serie):
+    """Devuelve los rangos (inicio, fin) de días consecutivos de [inicio, fin] que no están en la serie"""
+
+    faltan = pd.date_range(inicio, fin, freq='D').difference(serie.index)
+    if faltan.empty:
+        return []
+
+    # Cada salto de más de un día entre días que faltan empieza un rango nuevo
+    nuevo_rango = (faltan.to_series().diff() != pd.Timedelta(days=1)).cumsum()
+    return [(rango.min(), rango.max()) for _, rango in faltan.to_series().groupby(nuevo_rango.to_numpy())]
+
+def tramosPendientes(inicio, fin, serie):
+    """Devuelve los recorridos de tramos (inicio, fin) que faltan para cubrir [inicio, fin] a partir de la
+    serie guardada, uno por cada rango de días sin cubrir (antes, dentro o después de la serie). Cada tramo
+    de un recorrido solapa DIAS_SOLAPE días con lo ya cubierto (la serie o el tramo anterior del recorrido)
+    para poder empalmarlo, así que si un tramo falla no se puede seguir con el resto del recorrido.
+    Los rangos anteriores a la serie se recorren hacia atrás y los demás hacia delante"""
+
+    paso = timedelta(days=DIAS_TRAMO - DIAS_SOLAPE)
+    solape = timedelta(days=DIAS_SOLAPE)
+    dia = timedelta(days=1)
+
+    if serie.empty:
+        # Sin serie el primer tramo no solapa con nada y el resto se recorre hacia delante desde él
+        primero = (inicio, min(inicio + timedelta(days=DIAS_TRAMO - 1), fin))
+        recorrido = [primero]
+        cubierto_fin = primero[1]
+        while cubierto_fin < fin:
+            tramo_fin = min(cubierto_fin + paso, fin)
+            recorrido.append((cubierto_fin - solape + dia, tramo_fin))
+            cubierto_fin = tramo_fin
+        return [recorrido]
+
+    recorridos = []
+    for hueco_inicio, hueco_fin in diasSinCubrir(inicio, fin, serie):
+        recorrido = []
+
+        if hueco_inicio < serie.index.min():
+            # Hacia atrás desde el primer día cubierto después del rango
+            cubierto_inicio = hueco_fin + dia
+            while cubierto_inicio > hueco_inicio:
+                tramo_inicio = max(cubierto_inicio - paso, hueco_inicio)
+                recorrido.append((tramo_inicio, cubierto_inicio + solape - dia))
+                cubierto_inicio = tramo_inicio
+        else:
+            # Hacia delante desde el último día cubierto antes del rango
+            cubierto_fin = hueco_inicio - dia
+            while cubierto_fin < hueco_fin:
+                tramo_fin = min(cubierto_fin + paso, hueco_fin)
+                recorrido.append((cubierto_fin - solape + dia, tramo_fin))
+                cubierto_fin = tramo_fin
+
+        recorridos.append(recorrido)
+
+    return recorridos
+
+def asegurarSerie(keyword, categoria, inicio, fin, ruta = RUTA_SERIES, controlador = None):
+    """Descarga (solo lo que falta) la serie diaria de una keyword para cubrir [inicio, fin] y la devuelve.
+    Si un tramo no se puede descargar o empalmar se abandona su recorrido: solo se guarda la parte
+    contigua a lo ya cubierto y el resto se vuelve a intentar en la siguiente llamada"""
+
+    controlador = controlador or controlTasa.ControladorAIMD()
+    inicio, fin = pd.Timestamp(inicio).normalize(), pd.Timestamp(fin).normalize()
+    serie = leerSerie(keyword, categoria, ruta)
+
+    for recorrido in tramosPendientes(inicio, fin, serie):
+        for tramo_inicio, tramo_fin in recorrido:
+            tramo = descargarTramo(keyword, categoria, tramo_inicio, tramo_fin, controlador)
+            if tramo is None:
+                print(f"No hay datos de Trends para {keyword} entre {tramo_inicio:%Y-%m-%d} y {tramo_fin:%Y-%m-%d}")
+                break
+
+            empalmada = tramo if serie.empty else empalmar(serie, tramo)
+            if empalmada is None:
+                print(f"No se puede empalmar el tramo de {keyword} entre {tramo_inicio:%Y-%m-%d} y {tramo_fin:%Y-%m-%d}")
+                break
+
+            serie = empalmada
+
+    guardarSerie(keyword, categoria, serie, ruta)
+
+    return serie
+
+def interesVentana(serie, fecha, dias):
+    """Suma el interés de la serie en los dias días anteriores a la fecha (ambos extremos incluidos,
+    igual que el timeframe de getTrends). Devuelve NaN si a la serie le falta algún día de la ventana"""
+
+    fecha = pd.Timestamp(fecha).normalize()
+    inicio = fecha - timedelta(days=dias)
+
+    if serie.empty:
+        return np.nan
+
+    ventana = serie[inicio:fecha]
+    if len(ventana) < dias + 1:
+        return np.nan
+
+    return ventana.sum()
+
+def getTrendsDesdeSeries(df, dias = googleTrends.DIAS_VENTANA, columna = 'BookInterest1M',
+                         categoria = googleTrends.CATEGORIA_LIBROS, ruta = RUTA_SERIES, controlador = None):
+    """Calcula la columna de interés de cada libro recortando su serie diaria local. Las series que
+    faltan se descargan una vez por título cubriendo todas sus fechas; el resto de ventanas (otra
+    columna, otros dias) se calculan sin volver a consultar Trends. Los valores están en la escala de
+    la serie empalmada, no en la de getTrends (que normaliza cada ventana de 30 días por separado).
+    Todas las consultas (keywords y tramos) van al ritmo de un mismo controlador AIMD; los títulos
+    cuya keyword no se ha podido obtener se quedan en NaN y se reintentan en la siguiente llamada"""
+
+    df[columna] = np.nan
+    controlador = controlador or controlTasa.ControladorAIMD()
+
+    # Resolvemos antes las keywords que faltan en la caché, con reintento de los 429
+    googleTrends.precargarKeywords(df['Title'].unique(), controlador)
+
+    for titulo, grupo in df.groupby('Title'):
+        fechas = pd.to_datetime(grupo['Date'])
+
+        # Si la keyword no se pudo obtener no la volvemos a pedir aquí (fuera del ritmo del controlador)
+        if cacheKeywords.leer(titulo) is cacheKeywords.NO_CACHEADO:
+            print(f"No se ha podido obtener la keyword de {titulo}")
+            continue
+        keyword = googleTrends.getAdvancedKeyword(titulo)
+
+        serie = asegurarSerie(keyword, categoria, fechas.min() - timedelta(days=dias), fechas.max(), ruta, controlador)
+
+        for i, fecha in fechas.items():
+            df.at[i, columna] = interesVentana(serie, fecha, dias)
+
+    return df
@@ -0,0 +1,96 @@
+"""
+Benchmark de la creación del df de autores a partir del df de libros
+
+Compara autoresWikipedia.crearDfAutores (por columnas: str.split + explode + drop_duplicates) con
+la versión anterior que recorría el df fila a fila con iterrows, sobre un df de libros sintético,
+y comprueba que las dos devuelven el mismo df.
+
+Uso (desde la raíz del proyecto):
+python -m benchmarks.benchmark_autores [filas] [repeticiones]
+"""
+
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+import adquisicion.autoresWikipedia as autoresWikipedia
+
+def crearDfAutoresIterrows(df_libros):
+    """Versión anterior de crearDfAutores, fila a fila"""
+    columnas = ['FullName', 'URL']
+    con_contribuidores = 'Contributors' in df_libros.columns
+    if con_contribuidores:
+        columnas.append('Contributors')
+    datos_autores = []
+
+    for index, row in df_libros.iterrows():
+        if isinstance(row['Author'], str):
+            autores = re.split(r'\s+and\s+|\s+with\s+', row['Author'])
+            for autor in autores:
+                autor = autor.strip()
+                datos_autor = {'FullName': autor, 'URL': row['url']}
+                if con_contribuidores:
+                    datos_autor['Contributors'] = row['Contributors']
+                datos_autores.append(datos_autor)
+
+    df_autores = pd.DataFrame(datos_autores, columns=columnas)
+    df_autores = df_autores.drop_duplicates(subset=['FullName'])
+    df_autores = df_autores.reset_index(drop=True)
+    return df_autores
+
+def crearDfLibros(filas, semilla = 0):
+    """Genera un df de libros con autores repetidos, varios autores por libro ('and', 'with'),
+    espacios sobrantes y valores que no son cadenas"""
+
+    aleatorio = random.Random(semilla)
+    n_autores = max(1, filas // 3)
+
+    def autor():
+        return f"Author {aleatorio.randrange(n_autores)}"
+
+    def autores():
+        tipo = aleatorio.random()
+        if tipo < 0.02:
+            return None
+        if tipo < 0.7:
+            return autor()
+        if tipo < 0.9:
+            return f"{autor()} and  {autor()} "
+        return f" {autor()} with {autor()} and {autor()}"
+
+    return pd.DataFrame({
+        'Title': [f"Book {i}" for i in range(filas)],
+        'Author': [autores() for _ in range(filas)],
+        'url': [f"https://www.goodreads.com/book/show/{i}" for i in range(filas)],
+        'Contributors': [[(f"Author {i}", f"https://www.goodreads.com/author/show/{i}")] for i in range(filas)]
+    })
+
+def medir(funcion, df_libros, repeticiones):
+    """Devuelve el tiempo medio (en s) de crear el df de autores"""
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(df_libros)
+    return (time.perf_counter() - inicio) / repeticiones
+
+def main(filas = 100000, repeticiones = 3):
+
+    df_libros = crearDfLibros(filas)
+    print(f"{filas} libros, {repeticiones} repeticiones")
+
+    anterior = crearDfAutoresIterrows(df_libros)
+    nuevo = autoresWikipedia.crearDfAutores(df_libros)
+    iguales = anterior.astype(object).equals(nuevo.astype(object))
+    print(f"{len(nuevo)} autores, mismo resultado que iterrows: {iguales}")
+
+    t_anterior = medir(crearDfAutoresIterrows, df_libros, repeticiones)
+    t_nuevo = medir(autoresWikipedia.crearDfAutores, df_libros, repeticiones)
+
+    print(f"iterrows: {t_anterior:8.3f} s")
+    print(f"columnas: {t_nuevo:8.3f} s  (x{t_anterior / t_nuevo:.1f})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,70 @@
+"""
+Benchmark de los extractores de la página de un libro de GoodReads
+
+Compara el tiempo de análisis por página de los extractores de goodreads.EXTRACTORES sobre
+un corpus de páginas de libros guardadas en disco (ficheros .html) y comprueba que todos
+devuelven la misma información.
+
+Uso (desde la raíz del proyecto):
+python -m benchmarks.benchmark_goodreads ruta/a/paginas [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+import adquisicion.goodreads as goodreads
+
+def cargarPaginas(ruta_carpeta):
+    """Devuelve el contenido de todas las páginas .html de la carpeta"""
+
+    ficheros = sorted(file for file in os.listdir(ruta_carpeta) if file.endswith('.html'))
+    paginas = []
+    for fichero in ficheros:
+        with open(os.path.join(ruta_carpeta, fichero), encoding='utf-8') as f:
+            paginas.append(f.read())
+    return paginas
+
+def normalizar(info):
+    """Ordena la lista de géneros (se obtiene de un set) y quita los campos que solo da
+    algún extractor para poder comparar resultados"""
+
+    info.pop('Awards', None)
+    if info.get('GenresList') is not None:
+        info['GenresList'] = sorted(info['GenresList'])
+    return info
+
+def extraer(extractor, html):
+    """Aplica un extractor devolviendo la excepción en lugar de lanzarla"""
+
+    try:
+        return normalizar(extractor(html))
+    except Exception as e:
+        return type(e).__name__
+
+def medir(extractor, paginas, repeticiones):
+    """Devuelve el tiempo medio por página (en ms) de un extractor"""
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for html in paginas:
+            extraer(extractor, html)
+    return (time.perf_counter() - inicio) * 1000 / (repeticiones * len(paginas))
+
+def main(ruta_carpeta, repeticiones = 5):
+
+    paginas = cargarPaginas(ruta_carpeta)
+    print(f"{len(paginas)} páginas, {repeticiones} repeticiones")
+
+    # Comprobamos que todos los extractores coinciden con el extractor 'dom'
+    for nombre, extractor in goodreads.EXTRACTORES.items():
+        distintas = sum(extraer(extractor, html) != extraer(goodreads.extraerInfoLibroDOM, html) for html in paginas)
+        print(f"{nombre}: {distintas} páginas con resultado distinto a 'dom'")
+
+    tiempos = {nombre: medir(extractor, paginas, repeticiones) for nombre, extractor in goodreads.EXTRACTORES.items()}
+
+    for nombre, tiempo in tiempos.items():
+        print(f"{nombre:>8}: {tiempo:8.2f} ms/página  (x{tiempos['dom'] / tiempo:.1f} respecto a 'dom')")
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
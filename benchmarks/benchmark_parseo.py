@@ -0,0 +1,82 @@
+"""
+Benchmark del backend de parseo HTML de los scrapers
+
+Para cada fuente compara el tiempo de parseo + extracción por página con html.parser (página
+completa, como antes), con el parser configurado en parseo (página completa) y con el parser
+configurado más el filtro del scraper, y comprueba que las tres opciones devuelven lo mismo.
+
+Las páginas guardadas se leen de una subcarpeta por fuente:
+    nyt/        páginas de la lista del NYT
+    wikipedia/  artículos de autores
+    goodreads/  páginas de libros (lista de autores)
+
+Uso (desde la raíz del proyecto):
+python -m benchmarks.benchmark_parseo ruta/a/paginas [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+import adquisicion.parseo as parseo
+import adquisicion.librosNYT as librosNYT
+import adquisicion.autoresWikipedia as autoresWikipedia
+import adquisicion.autoresGoodreads as autoresGoodreads
+
+from benchmarks.benchmark_goodreads import cargarPaginas
+
+# Extracción de cada fuente a partir del html de la página
+FUENTES = {
+    'nyt': lambda html: librosNYT.parsearListaNYT(html, None, None, None),
+    'wikipedia': lambda html: autoresWikipedia.extraerInfoAutor(parseo.crearSoup(html, autoresWikipedia.FILTRO_ARTICULO)),
+    'goodreads': autoresGoodreads.getContribuidoresLibro
+}
+
+# (nombre, parser, filtrar)
+CONFIGURACIONES = [
+    ('html.parser', 'html.parser', False),
+    (parseo.PARSER_POR_DEFECTO, parseo.PARSER_POR_DEFECTO, False),
+    (parseo.PARSER_POR_DEFECTO + ' + filtro', parseo.PARSER_POR_DEFECTO, True)
+]
+
+def extraer(funcion, html):
+    """Aplica la extracción devolviendo la excepción en lugar de lanzarla"""
+
+    try:
+        return funcion(html)
+    except Exception as e:
+        return type(e).__name__
+
+def medir(funcion, paginas, repeticiones):
+    """Devuelve el tiempo medio por página (en ms) de una extracción"""
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for html in paginas:
+            extraer(funcion, html)
+    return (time.perf_counter() - inicio) * 1000 / (repeticiones * len(paginas))
+
+def main(ruta_carpeta, repeticiones = 5):
+
+    for fuente, funcion in FUENTES.items():
+        ruta_fuente = os.path.join(ruta_carpeta, fuente)
+        if not os.path.isdir(ruta_fuente):
+            continue
+
+        paginas = cargarPaginas(ruta_fuente)
+        print(f"--- {fuente}: {len(paginas)} páginas, {repeticiones} repeticiones")
+
+        tiempos = {}
+        resultados = {}
+        for nombre, parser, filtrar in CONFIGURACIONES:
+            parseo.configurar(parser, filtrar)
+            resultados[nombre] = [extraer(funcion, html) for html in paginas]
+            tiempos[nombre] = medir(funcion, paginas, repeticiones)
+
+        base = CONFIGURACIONES[0][0]
+        for nombre, tiempo in tiempos.items():
+            distintas = sum(a != b for a, b in zip(resultados[nombre], resultados[base]))
+            print(f"{nombre:>16}: {tiempo:8.2f} ms/página  (x{tiempos[base] / tiempo:.1f} respecto a {base}, {distintas} páginas distintas)")
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,54 @@
+"""
+Benchmark de los extractores de la página de un autor de Wikipedia
+
+Compara el tiempo de extracción por página de los extractores de autoresWikipedia.EXTRACTORES
+sobre un corpus de artículos guardados en disco (ficheros .html) y comprueba que todos devuelven
+la misma información. El árbol de cada página se construye una vez antes de medir.
+
+Uso (desde la raíz del proyecto):
+python -m benchmarks.benchmark_wikipedia ruta/a/paginas [repeticiones]
+"""
+
+import sys
+import time
+
+import adquisicion.autoresWikipedia as autoresWikipedia
+import adquisicion.parseo as parseo
+
+from benchmarks.benchmark_goodreads import cargarPaginas
+
+def extraer(extractor, soup):
+    """Aplica un extractor devolviendo la excepción en lugar de lanzarla"""
+
+    try:
+        return extractor(soup)
+    except Exception as e:
+        return type(e).__name__
+
+def medir(extractor, soups, repeticiones):
+    """Devuelve el tiempo medio por página (en ms) de un extractor"""
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for soup in soups:
+            extraer(extractor, soup)
+    return (time.perf_counter() - inicio) * 1000 / (repeticiones * len(soups))
+
+def main(ruta_carpeta, repeticiones = 5):
+
+    paginas = cargarPaginas(ruta_carpeta)
+    soups = [parseo.crearSoup(html, autoresWikipedia.FILTRO_ARTICULO) for html in paginas]
+    print(f"{len(paginas)} páginas, {repeticiones} repeticiones")
+
+    # Comprobamos que todos los extractores coinciden con el extractor 'dom'
+    for nombre, extractor in autoresWikipedia.EXTRACTORES.items():
+        distintas = sum(extraer(extractor, soup) != extraer(autoresWikipedia.extraerInfoAutor, soup) for soup in soups)
+        print(f"{nombre}: {distintas} páginas con resultado distinto a 'dom'")
+
+    tiempos = {nombre: medir(extractor, soups, repeticiones) for nombre, extractor in autoresWikipedia.EXTRACTORES.items()}
+
+    for nombre, tiempo in tiempos.items():
+        print(f"{nombre:>8}: {tiempo:8.2f} ms/página  (x{tiempos['dom'] / tiempo:.1f} respecto a 'dom')")
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
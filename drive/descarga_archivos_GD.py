@@ -15,13 +15,22 @@ Ejemplo:
 
 Requisitos:
 - Módulo 'requests' instalado en el entorno Python donde se ejecute este script.
+- Módulo 'adquisicion/clienteHTTP.py' del proyecto (se añade la raíz del proyecto al path si hace falta).
 
 Fecha: 02/2024
 """
 
 
-import requests
 import os
+import sys
+
+# Los notebooks solo añaden la carpeta 'drive' al path, así que añadimos la raíz del proyecto
+# para poder usar el cliente HTTP compartido
+try:
+    import adquisicion.clienteHTTP as clienteHTTP
+except ImportError:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    import adquisicion.clienteHTTP as clienteHTTP
 
 def descargar_archivo_directo(id_archivo, directorio_destino, archivo_destino):
     """
@@ -40,7 +49,7 @@ def descargar_archivo_directo(id_archivo, directorio_destino, archivo_destino):
     url = f"https://drive.google.com/uc?export=download&id={id_archivo}"
 
     # Realiza la petición HTTP GET para descargar el archivo
-    respuesta = requests.get(url, allow_redirects=True)
+    respuesta = clienteHTTP.get(url, allow_redirects=True)
 
     # Comprueba que el directorio destino existe, si no, lo crea
     os.makedirs(directorio_destino, exist_ok=True)
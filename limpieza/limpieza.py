@@ -57,6 +57,9 @@ def eliminarColumnasInnecesarias(df):
     """Elimina aquellas columnas que no son relevantes"""
 
     df = df.drop(COLUMNAS_INNECESARIAS, axis=1)
+
+    # Los autores de GoodReads de cada libro (Contributors) solo se usan en la adquisición de autores
+    df = df.drop(['Contributors'], axis=1, errors='ignore')
     
     # Eliminamos columnas que contienen "unnamed"
     unnamed_columns = [col for col in df.columns if 'unnamed' in col.lower()]